@@ -0,0 +1,40 @@
+import numpy as np
+from model import SLOT_TYPES
+
+class AccumulatorSnapshot:
+    def __init__(self, model, counts, packetBytes, slots):
+        self.slots  = slots  # slots accounted since the last reset
+        self.counts = counts  # (nodes x slot types), column slotType - 1
+        self.charge = counts * model.coefficientsA[1:] + packetBytes * model.coefficientsB[1:]  # uC
+        self.nodeCharge = self.charge.sum(axis=1)  # uC
+
+# Energy accounting for simulators, onSlot() is called once per executed slot. Per event it only
+# bumps the slot count and packet byte count of the node and slot type in preallocated flat lists,
+# the charges follow from the model's per-slot-type coefficients when taking a snapshot.
+class SlotAccumulator:
+    def __init__(self, model, nodeCount):
+        self.model = model
+        self.nodeCount = nodeCount
+        self.stride = len(SLOT_TYPES) + 1
+        self.counts = [0] * (nodeCount * self.stride)
+        self.packetBytes = [0] * (nodeCount * self.stride)
+
+    def onSlot(self, node, slotType, packetSize=0):
+        if not 0 < slotType < self.stride:
+            raise RuntimeError("Invalid slot type")
+        if not 0 <= node < self.nodeCount:
+            raise RuntimeError("Invalid node")
+
+        index = node * self.stride + slotType
+        self.counts[index] += 1
+        self.packetBytes[index] += packetSize
+
+    def snapshot(self):
+        counts = np.array(self.counts, dtype=np.int64).reshape(self.nodeCount, self.stride)
+        packetBytes = np.array(self.packetBytes, dtype=np.float64).reshape(self.nodeCount, self.stride)
+        return AccumulatorSnapshot(self.model, counts[:, 1:], packetBytes[:, 1:], int(counts.sum()))
+
+    # Lists are cleared in place so bound references to onSlot stay valid
+    def reset(self):
+        self.counts[:] = [0] * len(self.counts)
+        self.packetBytes[:] = [0] * len(self.packetBytes)
@@ -0,0 +1,241 @@
+import itertools
+import numpy as np
+from model import SlotType, PACKET_LENGTH
+from schedule import ScheduleEnergy, BATTERY_CAPACITY
+from montecarlo import SLOTFRAME_LENGTH, MAX_RETRIES
+from analytic import deliveryProbability, expectedAttempts, treeLoads
+
+UTILIZATION = 0.8       # highest expected fraction of the cells of a link that carry an attempt
+MAX_SHARED_CELLS = 4    # shared cells a parent offers its children at most
+EXACT_LIMIT = 10**6     # allocations the exact mode enumerates at most
+COLLISION_ITERATIONS = 100
+
+SINK = -1  # parent of the nodes that send to the sink, which is not allocated and not charged
+
+# Cell allocation for a routing tree: every child either gets dedicated TX cells to its parent, each
+# matched by an RX cell of the parent, or contends in the shared cells its parent listens in. Nodes carry
+# their demand (packets per slotframe) plus everything their children carry, and the dedicated cells of
+# a link are the fewest that keep its expected attempts under utilization. Children of the sink form a
+# group like any other, only the sink's own cells are not charged. Charges are those of the slots
+# above sleeping, priced with the model, so that cells that carry no attempt count as Sleep.
+class AllocationProblem:
+    def __init__(self, model, parents, demands, pdr, ackLoss=0.0, maxRetries=MAX_RETRIES, packetSize=PACKET_LENGTH,
+                 slotframeLength=SLOTFRAME_LENGTH, utilization=UTILIZATION, maxSharedCells=MAX_SHARED_CELLS,
+                 minDelivery=0.0):
+        self.model = model
+        self.parents = np.asarray(parents, dtype=np.int64)
+        nodeCount = len(self.parents)
+        self.demands = np.broadcast_to(np.asarray(demands, dtype=np.float64), (nodeCount,))
+        self.pdr = np.broadcast_to(np.asarray(pdr, dtype=np.float64), (nodeCount,))
+        self.ackLoss = np.broadcast_to(np.asarray(ackLoss, dtype=np.float64), (nodeCount,))
+        self.maxRetries = maxRetries
+        self.packetSize = packetSize
+        self.slotframeLength = slotframeLength
+        self.utilization = utilization
+        self.maxSharedCells = maxSharedCells
+        self.minDelivery = minDelivery  # lowest delivery probability of a child in shared cells
+
+        if np.any(self.parents >= nodeCount) or np.any(self.parents == np.arange(nodeCount)):
+            raise RuntimeError("Invalid parent")
+
+        self.loads = treeLoads(self.parents, self.demands)  # packets per slotframe
+
+        self.sleepCharge = model.coefficientsA[SlotType.Sleep]
+        self.extraCharge = {}  # uC above Sleep
+        for slotType in (SlotType.TxDataRxAck, SlotType.TxDataRxAckMissing, SlotType.RxDataTxAck, SlotType.RxIdle):
+            self.extraCharge[slotType] = float(model.charges(slotType, packetSize)) - self.sleepCharge
+
+        # Dedicated links only depend on their own PDR
+        self.attempts = self.loads * expectedAttempts(self.pdr, maxRetries, self.ackLoss)  # per slotframe
+        self.dedicatedCells = np.ceil(self.attempts / utilization).astype(np.int64)
+        self.dedicatedTxCharge = self.txCharge(self.loads, self.pdr, self.ackLoss)
+        self.dedicatedRxData = self.loads * self.pdr * expectedAttempts(self.pdr, maxRetries, self.ackLoss)
+
+        order = np.argsort(self.parents, kind='stable')
+        bounds = np.searchsorted(self.parents[order], np.arange(nodeCount + 1))
+        self.children = [order[bounds[node]:bounds[node + 1]] for node in range(nodeCount)]
+        self.sinkChildren = np.flatnonzero(self.parents == SINK)
+
+    def nodeCount(self):
+        return len(self.parents)
+
+    def groupChildren(self, parent):
+        return self.sinkChildren if parent == SINK else self.children[parent]
+
+    # Charge above sleeping (uC per slotframe) of sending loads packets over links with the given PDR
+    def txCharge(self, loads, pdr, ackLoss):
+        delivered = deliveryProbability(pdr, self.maxRetries, ackLoss)
+        attempts = expectedAttempts(pdr, self.maxRetries, ackLoss)
+        return loads * (delivered * self.extraCharge[SlotType.TxDataRxAck] +
+                        (attempts - delivered) * self.extraCharge[SlotType.TxDataRxAckMissing])
+
+    # PDR and attempts per slotframe of the children contending in sharedCells shared cells. A child
+    # transmits in a shared cell with probability attempts / sharedCells and its frame only arrives if no
+    # sibling transmits in the same cell, the attempts and collisions are solved as a fixed point.
+    def sharedLinks(self, children, sharedCells):
+        pdr = self.pdr[children]
+        ackLoss = self.ackLoss[children]
+        effectivePdr = pdr
+        for _ in range(COLLISION_ITERATIONS):
+            attempts = self.loads[children] * expectedAttempts(effectivePdr, self.maxRetries, ackLoss)
+            idle = np.log1p(-np.minimum(attempts / sharedCells, 1 - 1e-12))
+            nextPdr = pdr * np.exp(idle.sum() - idle)
+            if np.allclose(nextPdr, effectivePdr, rtol=0, atol=1e-12):
+                break
+            effectivePdr = nextPdr
+        return effectivePdr, self.loads[children] * expectedAttempts(effectivePdr, self.maxRetries, ackLoss)
+
+    # Charges of one parent's group, when the children in shared use its sharedCells shared cells and the
+    # others their dedicated cells, or None if the shared children do not fit in the shared cells
+    def groupOption(self, parent, shared, sharedCells):
+        children = self.groupChildren(parent)
+        txCharge = self.dedicatedTxCharge[children].copy()
+        txCells = np.where(shared, sharedCells, self.dedicatedCells[children])
+        rxCells = int(self.dedicatedCells[children][~shared].sum()) + sharedCells
+        rxData = self.dedicatedRxData[children][~shared].sum()
+
+        if np.any(shared):
+            sharedChildren = children[shared]
+            effectivePdr, attempts = self.sharedLinks(sharedChildren, sharedCells)
+            if attempts.sum() > self.utilization * sharedCells:
+                return None
+            ackLoss = self.ackLoss[sharedChildren]
+            if np.any(deliveryProbability(effectivePdr, self.maxRetries, ackLoss) < self.minDelivery):
+                return None
+            txCharge[shared] = self.txCharge(self.loads[sharedChildren], effectivePdr, ackLoss)
+            rxData += (effectivePdr * attempts).sum()
+
+        rxCharge = rxData * self.extraCharge[SlotType.RxDataTxAck] + (rxCells - rxData) * self.extraCharge[SlotType.RxIdle]
+        return GroupOption(shared, sharedCells, txCharge, txCells, rxCharge, rxCells)
+
+    # Feasible options of a parent's group. All subsets of the children are tried, or with heuristic only
+    # sharing the children with the fewest attempts
+    def groupOptions(self, parent, heuristic=False):
+        children = self.groupChildren(parent)
+        if heuristic:
+            order = np.argsort(self.attempts[children], kind='stable')
+            masks = []
+            for count in range(len(children) + 1):
+                mask = np.zeros(len(children), dtype=bool)
+                mask[order[:count]] = True
+                masks.append(mask)
+        else:
+            masks = [np.array(mask, dtype=bool) for mask in itertools.product((False, True), repeat=len(children))]
+
+        options = []
+        for mask in masks:
+            for sharedCells in (range(1, self.maxSharedCells + 1) if np.any(mask) else (0,)):
+                option = self.groupOption(parent, mask, sharedCells)
+                if option is not None:
+                    options.append(option)
+        return options
+
+class GroupOption:
+    def __init__(self, shared, sharedCells, txCharge, txCells, rxCharge, rxCells):
+        self.shared = shared            # children transmitting in the shared cells
+        self.sharedCells = sharedCells
+        self.txCharge = txCharge        # uC per slotframe above Sleep, per child
+        self.txCells = txCells          # per child
+        self.rxCharge = rxCharge        # uC per slotframe above Sleep of the parent
+        self.rxCells = rxCells
+
+class CellAllocation:
+    def __init__(self, problem, txCharge, txCells, rxCharge, rxCells, shared, sharedCells, batteryCapacity):
+        self.shared = shared            # nodes transmitting in their parent's shared cells
+        self.sharedCells = sharedCells  # shared cells every node listens in
+        self.txCells = txCells          # cells every node transmits in, dedicated or shared
+        self.rxCells = rxCells          # cells every node listens in, dedicated or shared
+        self.dedicatedCells = np.where(shared, 0, txCells)
+        self.chargePerSlotframe = problem.slotframeLength * problem.sleepCharge + txCharge + rxCharge  # uC
+        self.energy = ScheduleEnergy(problem.model, problem.slotframeLength, self.chargePerSlotframe, batteryCapacity)
+
+def objectiveValue(charges, objective):
+    if objective == 'max':
+        return (charges.max(), charges.sum())
+    if objective == 'total':
+        return (charges.sum(),)
+    raise RuntimeError("Unsupported objective")
+
+# Allocation minimizing the worst node's ('max') or the total ('total') charge per slotframe. The exact
+# mode enumerates every combination of group options and is meant for small trees, to validate the
+# greedy mode. That one starts from dedicated cells only and repeatedly replaces the option of one group
+# at a time by its best heuristic option, given the others, until no group changes.
+def allocateCells(problem, objective='max', exact=False, batteryCapacity=BATTERY_CAPACITY, maxPasses=20):
+    nodeCount = problem.nodeCount()
+    parents = [parent for parent in [SINK] + list(range(nodeCount)) if len(problem.groupChildren(parent))]
+
+    if exact:
+        # Bounded before any option is evaluated: a group has its dedicated option plus one per
+        # nonempty subset of shared children and number of shared cells
+        combinations = 1
+        for parent in parents:
+            combinations *= 1 + (2 ** len(problem.groupChildren(parent)) - 1) * problem.maxSharedCells
+            if combinations > EXACT_LIMIT:
+                raise RuntimeError("Too many allocations for the exact mode")
+
+    groupOptions = [problem.groupOptions(parent, heuristic=not exact) for parent in parents]
+
+    txCharge = np.zeros(nodeCount)
+    txCells = np.zeros(nodeCount, dtype=np.int64)
+    rxCharge = np.zeros(nodeCount)
+    rxCells = np.zeros(nodeCount, dtype=np.int64)
+    shared = np.zeros(nodeCount, dtype=bool)
+    sharedCells = np.zeros(nodeCount, dtype=np.int64)
+
+    def apply(parent, option):
+        children = problem.groupChildren(parent)
+        txCharge[children] = option.txCharge
+        txCells[children] = option.txCells
+        shared[children] = option.shared
+        if parent != SINK:
+            rxCharge[parent] = option.rxCharge
+            rxCells[parent] = option.rxCells
+            sharedCells[parent] = option.sharedCells
+
+    def fits(nodes):
+        return np.all(txCells[nodes] + rxCells[nodes] <= problem.slotframeLength)
+
+    def charges():
+        return problem.slotframeLength * problem.sleepCharge + txCharge + rxCharge
+
+    if exact:
+        best = None
+        for combination in itertools.product(*groupOptions):
+            for parent, option in zip(parents, combination):
+                apply(parent, option)
+            if fits(slice(None)):
+                value = objectiveValue(charges(), objective)
+                if best is None or value < best[0]:
+                    best = (value, combination)
+        if best is None:
+            raise RuntimeError("No allocation fits the slotframe")
+        for parent, option in zip(parents, best[1]):
+            apply(parent, option)
+    else:
+        # The first option of every group is dedicated cells only
+        for parent, options in zip(parents, groupOptions):
+            apply(parent, options[0])
+
+        current = [0] * len(parents)
+        for _ in range(maxPasses):
+            changed = False
+            for index, (parent, options) in enumerate(zip(parents, groupOptions)):
+                nodes = problem.groupChildren(parent) if parent == SINK else np.append(problem.children[parent], parent)
+                bestIndex, bestValue = current[index], None
+                for optionIndex, option in enumerate(options):
+                    apply(parent, option)
+                    if fits(nodes):
+                        value = objectiveValue(charges(), objective)
+                        if bestValue is None or value < bestValue:
+                            bestIndex, bestValue = optionIndex, value
+                apply(parent, options[bestIndex])
+                if bestIndex != current[index]:
+                    current[index] = bestIndex
+                    changed = True
+            if not changed:
+                break
+
+        if not fits(slice(None)):
+            raise RuntimeError("No allocation fits the slotframe")
+
+    return CellAllocation(problem, txCharge, txCells, rxCharge, rxCells, shared, sharedCells, batteryCapacity)
@@ -0,0 +1,90 @@
+import numpy as np
+from model import SlotType, SLOT_TYPES, PACKET_LENGTH
+from schedule import ScheduleEnergy, BATTERY_CAPACITY
+from montecarlo import MAX_RETRIES
+
+# Closed-form counterpart of the Monte Carlo simulator. A packet is sent up to maxRetries + 1 times and an
+# attempt succeeds when the data frame arrives (pdr) and its ACK is not lost (1 - ackLoss), so the number
+# of attempts is a geometric variable truncated at maxRetries + 1. All functions broadcast over arrays of
+# links or scenarios.
+
+def attemptSuccess(pdr, ackLoss=0.0):
+    return np.asarray(pdr, dtype=np.float64) * (1 - np.asarray(ackLoss, dtype=np.float64))
+
+def deliveryProbability(pdr, maxRetries=MAX_RETRIES, ackLoss=0.0):
+    return 1 - (1 - attemptSuccess(pdr, ackLoss)) ** (np.asarray(maxRetries) + 1)
+
+def expectedAttempts(pdr, maxRetries=MAX_RETRIES, ackLoss=0.0):
+    success = attemptSuccess(pdr, ackLoss)
+    attempts = np.asarray(maxRetries, dtype=np.float64) + 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(success > 0, (1 - (1 - success) ** attempts) / success, attempts)
+
+# Expected slots of the sender and the receiver per packet offered to a link, as (..., slot types) with
+# column slotType. A data frame that does not arrive leaves the receiver's cell idle.
+def linkSlots(pdr, maxRetries=MAX_RETRIES, ackLoss=0.0):
+    pdr = np.asarray(pdr, dtype=np.float64)
+    delivered = deliveryProbability(pdr, maxRetries, ackLoss)
+    attempts = expectedAttempts(pdr, maxRetries, ackLoss)
+
+    slots = np.zeros(np.broadcast(pdr, delivered, attempts).shape + (len(SLOT_TYPES) + 1,))
+    slots[..., SlotType.TxDataRxAck] = delivered
+    slots[..., SlotType.TxDataRxAckMissing] = attempts - delivered
+    slots[..., SlotType.RxDataTxAck] = pdr * attempts
+    slots[..., SlotType.RxIdle] = (1 - pdr) * attempts
+    return slots
+
+# Expected slots per delivered packet, not finite for links that never deliver
+def deliveredPacketSlots(pdr, maxRetries=MAX_RETRIES, ackLoss=0.0):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return linkSlots(pdr, maxRetries, ackLoss) / deliveryProbability(pdr, maxRetries, ackLoss)[..., None]
+
+# Expected charge (uC) of the sender and the receiver per delivered packet, infinite for links that never deliver
+def chargePerDeliveredPacket(model, pdr, maxRetries=MAX_RETRIES, ackLoss=0.0, packetSize=PACKET_LENGTH):
+    slotCharges = model.charges(np.array(SLOT_TYPES), np.asarray(packetSize, dtype=np.float64)[..., None])
+    chargePerPacket = (linkSlots(pdr, maxRetries, ackLoss)[..., 1:] * slotCharges).sum(axis=-1)
+    with np.errstate(divide='ignore'):
+        return chargePerPacket / deliveryProbability(pdr, maxRetries, ackLoss)
+
+# Packets per slotframe every node of a routing tree sends: its own rate plus the share delivered of
+# what its children send
+def treeLoads(parents, rates, delivered=1.0):
+    parents = np.asarray(parents)
+    hasParent = parents >= 0
+    delivered = np.broadcast_to(delivered, parents.shape)
+
+    loads = np.array(rates, dtype=np.float64)
+    for _ in range(len(parents) + 1):
+        forwarded = np.bincount(parents[hasParent], weights=(loads * delivered)[hasParent], minlength=len(parents))
+        nextLoads = rates + forwarded
+        if np.array_equal(nextLoads, loads):
+            return loads
+        loads = nextLoads
+
+    raise RuntimeError("Routing tree has a cycle")
+
+def nodeLoads(scenario):
+    return treeLoads(scenario.parents, scenario.rates, deliveryProbability(scenario.pdr, scenario.maxRetries, scenario.ackLoss))
+
+# Expected slots per slotframe of every node of a montecarlo.NetworkScenario (nodes x slot types, column
+# slotType), the mean of the simulator when no node runs out of TX cells
+def networkSlots(scenario):
+    hasParent = scenario.parents >= 0
+    parents = scenario.parents[hasParent]
+    loads = nodeLoads(scenario)
+    perPacket = linkSlots(scenario.pdr, scenario.maxRetries, scenario.ackLoss) * loads[:, None]
+
+    slots = np.zeros((scenario.nodeCount(), len(SLOT_TYPES) + 1))
+    slots[:, SlotType.TxDataRxAck] = perPacket[:, SlotType.TxDataRxAck]
+    slots[:, SlotType.TxDataRxAckMissing] = perPacket[:, SlotType.TxDataRxAckMissing]
+    slots[:, SlotType.RxDataTxAck] = np.bincount(parents, weights=perPacket[hasParent, SlotType.RxDataTxAck],
+                                                 minlength=scenario.nodeCount())
+    slots[:, SlotType.RxIdle] = scenario.rxCells - slots[:, SlotType.RxDataTxAck]
+    attempts = slots[:, SlotType.TxDataRxAck] + slots[:, SlotType.TxDataRxAckMissing]
+    slots[:, SlotType.Sleep] = scenario.slotframeLength - attempts - scenario.rxCells
+    return slots
+
+def evaluateNetwork(model, scenario, batteryCapacity=BATTERY_CAPACITY):
+    slotCharges = model.charges(np.array(SLOT_TYPES), scenario.packetSize[:, None])
+    chargePerSlotframe = (networkSlots(scenario)[:, 1:] * slotCharges).sum(axis=1)
+    return ScheduleEnergy(model, scenario.slotframeLength, chargePerSlotframe, batteryCapacity)
@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from model import Model, Currents, CompiledModel, SlotTimeline, SlotType, SLOT_TYPES, TX_POWERS, PACKET_LENGTH
+
+BATCH_SIZES = (10**3, 10**4, 10**5, 10**6, 10**7, 10**8)
+THRESHOLD = 0.25  # allowed slowdown relative to the baseline
+BASELINE = 'benchmark-baseline.json'
+
+SLOT_TYPE_NAMES = dict((getattr(SlotType, name), name) for name in dir(SlotType) if not name.startswith('_'))
+
+# Best time of `repeat` runs of `number` calls, divided by number * units (seconds per unit)
+def measure(function, number=1, repeat=5, units=1):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return best / (number * units)
+
+def configurations():
+    for radio, powers in TX_POWERS.items():
+        for power in powers:
+            yield radio, power, radio + '-' + str(power) + 'dBm'
+
+def scalarBenchmarks():
+    for radio, power, name in configurations():
+        model = Model(radio, power)
+        for slotType in SLOT_TYPES:
+            def run(model=model, slotType=slotType):
+                return measure(lambda: model(slotType, PACKET_LENGTH), number=10000)
+            yield 'scalar/' + name + '/' + SLOT_TYPE_NAMES[slotType], run
+
+def batchBenchmarks(maxBatchSize):
+    model = Model()
+    for size in BATCH_SIZES:
+        if size > maxBatchSize:
+            continue
+        def run(size=size):
+            rng = np.random.default_rng(0)
+            slotTypes = rng.integers(1, len(SLOT_TYPES) + 1, size, dtype=np.int8)
+            packetSizes = rng.integers(0, PACKET_LENGTH + 1, size, dtype=np.uint8)
+            return measure(lambda: model.batch(slotTypes, packetSizes), repeat=3 if size >= 10**7 else 5, units=size)
+        yield 'batch/' + str(size), run
+
+def constructionBenchmarks():
+    for radio, power, name in configurations():
+        # Bypasses the model cache
+        def run(radio=radio, power=power, timing=Model(radio, power).timing, currents=Currents(radio, power)):
+            return measure(lambda: CompiledModel(radio, power, *timing, currents=currents), number=10)
+        yield 'construction/' + name, run
+
+def waveformBenchmarks():
+    for radio, power, name in configurations():
+        # A fresh timeline per call bypasses its waveform cache
+        def run(timeline=Model(radio, power).timeline(SlotType.TxDataRxAck, PACKET_LENGTH)):
+            return measure(lambda: SlotTimeline(timeline.names, timeline.states, timeline.durations.copy(),
+                                                timeline.currents.copy()).waveform(1e6), number=100)
+        yield 'waveform/' + name, run
+
+def renderBenchmarks():
+    import plot
+    plot.useFileBackend()
+    for radio, power, name in configurations():
+        def run(radio=radio, power=power):
+            with tempfile.TemporaryDirectory() as outputDir:
+                return measure(lambda: plot.renderFigure((radio, power, 'TxDataRxAck', PACKET_LENGTH, outputDir)), repeat=3)
+        yield 'render/' + name, run
+
+def benchmarks(maxBatchSize):
+    yield from scalarBenchmarks()
+    yield from batchBenchmarks(maxBatchSize)
+    yield from constructionBenchmarks()
+    yield from waveformBenchmarks()
+    yield from renderBenchmarks()
+
+# Names of the benchmarks slower than the baseline by more than threshold
+def regressions(results, baseline, threshold=THRESHOLD):
+    return [name for name in results if name in baseline and results[name] > baseline[name] * (1 + threshold)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the model and plotting paths (seconds per call, slot or figure)')
+    parser.add_argument('--baseline', default=BASELINE, help='JSON file with baseline results to compare against, if it exists')
+    parser.add_argument('--save', help='write the results to this JSON file, e.g. the baseline')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='allowed slowdown, 0.25 is 25%%')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this string')
+    parser.add_argument('--max-batch-size', type=int, default=max(BATCH_SIZES))
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    for name, run in benchmarks(args.max_batch_size):
+        if args.filter in name:
+            results[name] = run()
+            line = '%-40s %12.3e s' % (name, results[name])
+            if name in baseline:
+                line += '  %+7.1f%%' % ((results[name] / baseline[name] - 1) * 100)
+            print(line)
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    failed = regressions(results, baseline, args.threshold)
+    for name in failed:
+        print('REGRESSION: ' + name)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import concurrent.futures
+import itertools
+import numpy as np
+from model import Model
+
+SEARCH_WINDOW = 100     # us a phase boundary may move away from its nominal position
+CHUNK_CAPTURES = 64     # captures in flight per chunk when segmenting in parallel
+
+# Fitted duration and current of one phase of one slot type, with the RMS residuals of the fit
+CALIBRATION_DTYPE = np.dtype([('slotType', 'u1'), ('name', 'U24'), ('state', 'U24'), ('captures', 'i8'),
+                              ('intercept', 'f8'), ('slope', 'f8'), ('durationRms', 'f8'),
+                              ('current', 'f8'), ('currentRms', 'f8')])
+
+# Per phase statistics of the captures: count, sum(packetSize), sum(packetSize^2), sum(duration),
+# sum(packetSize * duration), sum(duration^2), sum(samples), sum(samples^2), sample count
+STATISTICS = 9
+
+# Splits a captured current trace (mA, starting at the slot boundary) into the phases of the model's
+# timeline of its slot type and packet size. Every boundary between phases may lie within searchWindow
+# (us) of its nominal position, the boundaries minimizing the squared error of a constant current per
+# phase are found by dynamic programming over all candidate positions at once. Returns the phase names
+# and states with the measured durations (us), sample sums, sums of squares and sample counts.
+def segmentCapture(model, slotType, packetSize, samples, sampleRate=1e6, searchWindow=SEARCH_WINDOW):
+    if isinstance(samples, str):
+        samples = np.load(samples, mmap_mode='r')
+    samples = np.asarray(samples, dtype=np.float64)
+    timeline = model.timeline(slotType, packetSize)
+
+    nominal = np.concatenate(([0], np.cumsum(timeline.durations))) * sampleRate / 1000000
+    nominal = np.ceil(nominal - 1e-9).astype(np.int64)
+    window = int(round(searchWindow * sampleRate / 1000000))
+    candidates = np.clip(nominal[:, None] + np.arange(-window, window + 1), 0, len(samples))
+    candidates[0] = 0
+    candidates[-1] = len(samples)
+
+    sums = np.concatenate(([0], np.cumsum(samples)))
+    squares = np.concatenate(([0], np.cumsum(samples * samples)))
+
+    # errors[j] is the least squared error of the phases up to a boundary at candidates[k, j]
+    errors = np.zeros(candidates.shape[1])
+    choices = np.zeros(candidates.shape, dtype=np.int64)
+    for k in range(1, len(candidates)):
+        first = candidates[k - 1][:, None]
+        last = candidates[k][None, :]
+        counts = last - first
+        phaseErrors = squares[last] - squares[first] - (sums[last] - sums[first]) ** 2 / np.maximum(counts, 1)
+        totalErrors = np.where(counts > 0, errors[:, None] + phaseErrors, np.inf)
+        choices[k] = np.argmin(totalErrors, axis=0)
+        errors = totalErrors[choices[k], np.arange(candidates.shape[1])]
+
+    if not np.isfinite(errors[0]):
+        raise RuntimeError("Capture does not match the phases of the slot")
+
+    boundaries = np.zeros(len(candidates), dtype=np.int64)
+    choice = 0
+    for k in range(len(candidates) - 1, -1, -1):
+        boundaries[k] = candidates[k, choice]
+        choice = choices[k, choice]
+
+    durations = np.diff(boundaries) / sampleRate * 1000000
+    return (slotType, packetSize, timeline.names, timeline.states, durations,
+            np.diff(sums[boundaries]), np.diff(squares[boundaries]), np.diff(boundaries))
+
+def segmentTask(task):
+    return segmentCapture(*task)
+
+# Accumulates the per phase statistics of segmented captures, so that captures can be streamed
+# through it and only the statistics stay in memory
+class CalibrationAccumulator:
+    def __init__(self):
+        self.phases = {}  # (slotType, name) -> row
+        self.states = []  # per row
+        self.statistics = np.zeros((0, STATISTICS))
+
+    def add(self, segments):
+        slotType, packetSize, names, states, durations, sums, squares, counts = segments
+        rows = []
+        for name, state in zip(names, states):
+            key = (slotType, name)
+            if key not in self.phases:
+                self.phases[key] = len(self.phases)
+                self.states.append(state)
+            rows.append(self.phases[key])
+        if len(self.phases) > len(self.statistics):
+            self.statistics = np.concatenate((self.statistics, np.zeros((len(self.phases) - len(self.statistics), STATISTICS))))
+
+        statistics = np.stack((np.ones(len(rows)), np.full(len(rows), packetSize), np.full(len(rows), packetSize ** 2),
+                               durations, packetSize * durations, durations * durations, sums, squares, counts), axis=1)
+        np.add.at(self.statistics, rows, statistics)
+
+    # Least squares fit of all phases at once: every phase duration is fitted as intercept + slope * packetSize
+    # (us) and the current of every state as the mean of the samples of all phases in that state. States
+    # that were not captured keep their current in referenceCurrents.
+    def fit(self, radio, referenceCurrents):
+        captures, sumSizes, sumSquaredSizes, sumDurations, sumProducts, sumSquaredDurations, sums, squares, counts = self.statistics.T
+
+        determinant = captures * sumSquaredSizes - sumSizes ** 2
+        fitted = determinant > 1e-9 * np.maximum(captures * sumSquaredSizes, 1)  # packet sizes vary
+        slope = np.where(fitted, (captures * sumProducts - sumSizes * sumDurations) / np.where(fitted, determinant, 1), 0)
+        intercept = (sumDurations - slope * sumSizes) / captures
+        durationError = (sumSquaredDurations - 2 * intercept * sumDurations - 2 * slope * sumProducts + intercept ** 2 * captures +
+                         2 * intercept * slope * sumSizes + slope ** 2 * sumSquaredSizes)
+
+        stateNames, stateIndex = np.unique(np.array(self.states, dtype=str), return_inverse=True)
+        stateCounts = np.bincount(stateIndex, weights=counts, minlength=len(stateNames))
+        stateCurrents = np.bincount(stateIndex, weights=sums, minlength=len(stateNames)) / np.maximum(stateCounts, 1)
+        current = stateCurrents[stateIndex]
+        currentError = squares - 2 * current * sums + current ** 2 * counts
+
+        phases = np.zeros(len(self.phases), dtype=CALIBRATION_DTYPE)
+        phases['slotType'] = [slotType for slotType, name in self.phases]
+        phases['name'] = [name for slotType, name in self.phases]
+        phases['state'] = self.states
+        phases['captures'] = captures
+        phases['intercept'] = intercept
+        phases['slope'] = slope
+        phases['durationRms'] = np.sqrt(np.maximum(durationError, 0) / captures)
+        phases['current'] = current
+        phases['currentRms'] = np.sqrt(np.maximum(currentError, 0) / np.maximum(counts, 1))
+
+        currents = dict(referenceCurrents)
+        for state, stateCurrent, stateCount in zip(stateNames, stateCurrents, stateCounts):
+            if stateCount > 0:
+                currents[str(state)] = float(stateCurrent)
+
+        return RadioProfile(radio, currents, phases)
+
+# Currents and phase durations of a radio fitted from measurements. Only the currents feed back into the
+# model, through Model(currents=...), the fitted durations are for comparison with the phase tables.
+class RadioProfile:
+    def __init__(self, radio, currents, phases):
+        self.radio = radio
+        self.currents = currents  # mA per CPU/radio state
+        self.phases = phases      # CALIBRATION_DTYPE per slot type and phase
+
+    def durations(self):
+        return dict(((int(phase['slotType']), str(phase['name'])), (float(phase['intercept']), float(phase['slope'])))
+                    for phase in self.phases)
+
+    def model(self, txPower=0, **timing):
+        return Model(self.radio, txPower, currents=self.currents, **timing)
+
+# Relative deviation of every state's current from the reference, e.g. of the model.py and plot.py calibrations:
+# currentDeviations(PlotCurrents('CC2538'), Currents('CC2538'))['CPU_ACTIVE_RADIO_SLEEP'] is about +0.33
+def currentDeviations(currents, referenceCurrents):
+    return dict((state, currents[state] / referenceCurrents[state] - 1) for state in referenceCurrents if state in currents)
+
+# Fits a radio profile to captures of (slotType, packetSize, samples), where samples is an array of the
+# current (mA) or the path of a .npy file that is memory mapped. Captures are consumed as a stream and
+# segmented across a process pool chunk by chunk, the model provides the nominal phases and the currents
+# of the states that were not captured.
+def fitCaptures(model, captures, sampleRate=1e6, searchWindow=SEARCH_WINDOW, workers=None, chunkCaptures=CHUNK_CAPTURES):
+    accumulator = CalibrationAccumulator()
+    tasks = ((model, slotType, packetSize, samples, sampleRate, searchWindow) for slotType, packetSize, samples in captures)
+
+    if workers == 1:
+        for task in tasks:
+            accumulator.add(segmentTask(task))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                chunk = list(itertools.islice(tasks, chunkCaptures))
+                if not chunk:
+                    break
+                for segments in executor.map(segmentTask, chunk):
+                    accumulator.add(segments)
+
+    return accumulator.fit(model.radio, model.currents)
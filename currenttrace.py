@@ -0,0 +1,33 @@
+import numpy as np
+from model import SlotType, uniqueSlots
+
+CHUNK_SLOTS = 4096
+
+# Writes the current trace (mA) of a sequence of slots, e.g. a node's slotframe tiled over hours,
+# into a .npy file opened as a memory map. Slots are written chunkSlots at a time, every distinct slot
+# of a chunk copies the model's cached waveform straight into its rows of the map, so no temporary
+# array of the chunk is built; yields the index of the first slot and the written samples of every chunk.
+def writeCurrentTrace(model, path, slotTypes, packetSizes=0, sampleRate=1e6, chunkSlots=CHUNK_SLOTS, dtype=np.float32):
+    slotTypes = np.asarray(slotTypes)
+    packetSizes = np.broadcast_to(packetSizes, slotTypes.shape)
+    samplesPerSlot = len(model.timeline(SlotType.Sleep).waveform(sampleRate))
+
+    trace = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(len(slotTypes) * samplesPerSlot,))
+    for start in range(0, len(slotTypes), chunkSlots):
+        end = min(start + chunkSlots, len(slotTypes))
+        samples = trace[start * samplesPerSlot:end * samplesPerSlot]
+        rows = samples.reshape(end - start, samplesPerSlot)
+        distinctTypes, distinctSizes, inverse = uniqueSlots(slotTypes[start:end], packetSizes[start:end])
+        for index, (slotType, packetSize) in enumerate(zip(distinctTypes, distinctSizes)):
+            waveform = model.timeline(slotType, packetSize).waveform(sampleRate)
+            if len(waveform) != samplesPerSlot:
+                raise RuntimeError("Slots differ in the number of samples")
+            rows[inverse == index] = waveform
+        yield start, samples
+
+    trace.flush()
+
+def currentTrace(model, path, slotTypes, packetSizes=0, sampleRate=1e6, chunkSlots=CHUNK_SLOTS, dtype=np.float32):
+    for start, samples in writeCurrentTrace(model, path, slotTypes, packetSizes, sampleRate, chunkSlots, dtype):
+        pass
+    return np.load(path, mmap_mode='r')
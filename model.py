@@ -1,3 +1,9 @@
+import argparse
+import functools
+import math
+import types
+import numpy as np
+
 class SlotType:
     TxDataRxAck = 1
     RxDataTxAck = 2
@@ -7,35 +13,86 @@ class SlotType:
     Sleep       = 6
     TxDataRxAckMissing = 7
 
-def Model(radio = 'CC2538', txPower = 0):
-    ACK_LENGTH = 27
-    CRC_LENGTH = 2
+SLOT_TYPES = (SlotType.TxDataRxAck, SlotType.RxDataTxAck, SlotType.TxData, SlotType.RxData,
+              SlotType.RxIdle, SlotType.Sleep, SlotType.TxDataRxAckMissing)
 
-    TsSlotDuration   = 15000
-    TsTxOffset       = 131 / 32768.0 * 1000000   # 4000us
-    TsTxAckDelay     = 151 / 32768.0 * 1000000   # 4606us
-    TsLongGT         =  43 / 32768.0 * 1000000   # 1300us
-    TsShortGT        =  16 / 32768.0 * 1000000   #  500us
+# Default TSCH timing template (us)
+TS_SLOT_DURATION = 15000
+TS_TX_OFFSET     = 131 / 32768.0 * 1000000   # 4000us
+TS_TX_ACK_DELAY  = 151 / 32768.0 * 1000000   # 4606us
+TS_LONG_GT       =  43 / 32768.0 * 1000000   # 1300us
+TS_SHORT_GT      =  16 / 32768.0 * 1000000   #  500us
+
+# Supported txPower values (dBm) per radio
+TX_POWERS = {'CC2538': (3, 0), 'CC1200': (14, 0)}
+
+MODEL_CACHE_SIZE = 64
+
+PACKET_LENGTH = 125  # Excludes CRC, maximum allowed value is 125
+
+PICOCOULOMB_PER_UC = 1000000
+
+# Per-phase record of a slot
+PHASE_DTYPE = np.dtype([('name', 'U24'), ('state', 'U24'), ('duration', 'f8'), ('current', 'f8'), ('charge', 'f8')])
+
+# Current consumption (mA) of every CPU/radio state
+def Currents(radio = 'CC2538', txPower = 0):
+    currents = {}
 
     if radio == 'CC2538':
-        CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  = 13.97
-        CONSUMPTION_CPU_ACTIVE_RADIO_IDLE   = 13.97
-        CONSUMPTION_CPU_ACTIVE_RADIO_RX     = 26.94
-        CONSUMPTION_CPU_ACTIVE_RADIO_LISTEN = 31.14
-        CONSUMPTION_CPU_SLEEP_RADIO_SLEEP   = 10.06
-        CONSUMPTION_CPU_SLEEP_RADIO_IDLE    = 10.06
-        CONSUMPTION_CPU_SLEEP_RADIO_RX      = 23.16
-        CONSUMPTION_CPU_SLEEP_RADIO_LISTEN  = 27.18
+        currents['CPU_ACTIVE_RADIO_SLEEP']  = 13.97
+        currents['CPU_ACTIVE_RADIO_IDLE']   = 13.97
+        currents['CPU_ACTIVE_RADIO_RX']     = 26.94
+        currents['CPU_ACTIVE_RADIO_LISTEN'] = 31.14
+        currents['CPU_SLEEP_RADIO_SLEEP']   = 10.06
+        currents['CPU_SLEEP_RADIO_IDLE']    = 10.06
+        currents['CPU_SLEEP_RADIO_RX']      = 23.16
+        currents['CPU_SLEEP_RADIO_LISTEN']  = 27.18
 
         if txPower == 3:
-            CONSUMPTION_CPU_ACTIVE_RADIO_TX = 33.04
-            CONSUMPTION_CPU_SLEEP_RADIO_TX  = 29.01
+            currents['CPU_ACTIVE_RADIO_TX'] = 33.04
+            currents['CPU_SLEEP_RADIO_TX']  = 29.01
         elif txPower == 0:
-            CONSUMPTION_CPU_ACTIVE_RADIO_TX = 31.47
-            CONSUMPTION_CPU_SLEEP_RADIO_TX  = 27.55
+            currents['CPU_ACTIVE_RADIO_TX'] = 31.47
+            currents['CPU_SLEEP_RADIO_TX']  = 27.55
         else:
             raise RuntimeError("Unsupported txPower value")
 
+    elif radio == 'CC1200':
+        currents['CPU_ACTIVE_RADIO_SLEEP']  = 15.06
+        currents['CPU_ACTIVE_RADIO_IDLE']   = 17.49
+        currents['CPU_ACTIVE_RADIO_RX']     = 50.63
+        currents['CPU_ACTIVE_RADIO_LISTEN'] = 40.13
+        currents['CPU_SLEEP_RADIO_SLEEP']   = 11.42
+        currents['CPU_SLEEP_RADIO_IDLE']    = 13.82
+        currents['CPU_SLEEP_RADIO_RX']      = 46.73
+        currents['CPU_SLEEP_RADIO_LISTEN']  = 36.18
+
+        if txPower == 14:
+            currents['CPU_ACTIVE_RADIO_TX'] = 91.94
+            currents['CPU_SLEEP_RADIO_TX']  = 88.25
+        elif txPower == 0:
+            currents['CPU_ACTIVE_RADIO_TX'] = 54.26
+            currents['CPU_SLEEP_RADIO_TX']  = 50.24
+        else:
+            raise RuntimeError("Unsupported txPower value")
+
+    else:
+        raise RuntimeError("Unsupported radio specified")
+
+    return currents
+
+def PhaseFunction(radio, slotDuration, txOffset, txAckDelay, longGuardTime, shortGuardTime):
+    ACK_LENGTH = 27
+    CRC_LENGTH = 2
+
+    TsSlotDuration   = slotDuration
+    TsTxOffset       = txOffset
+    TsTxAckDelay     = txAckDelay
+    TsLongGT         = longGuardTime
+    TsShortGT        = shortGuardTime
+
+    if radio == 'CC2538':
         DelayTx          =  12 / 32768.0 * 1000000   #  366us
         DelayRx          =   0 / 32768.0 * 1000000   #    0us
         MaxTxDataPrepare =  66 / 32768.0 * 1000000   # 2014us
@@ -44,24 +101,6 @@ def Model(radio = 'CC2538', txPower = 0):
         MaxRxAckPrepare  =  10 / 32768.0 * 1000000   #  305us
 
     elif radio == 'CC1200':
-        CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  = 15.06
-        CONSUMPTION_CPU_ACTIVE_RADIO_IDLE   = 17.49
-        CONSUMPTION_CPU_ACTIVE_RADIO_RX     = 50.63
-        CONSUMPTION_CPU_ACTIVE_RADIO_LISTEN = 40.13
-        CONSUMPTION_CPU_SLEEP_RADIO_SLEEP   = 11.42
-        CONSUMPTION_CPU_SLEEP_RADIO_IDLE    = 13.82
-        CONSUMPTION_CPU_SLEEP_RADIO_RX      = 46.73
-        CONSUMPTION_CPU_SLEEP_RADIO_LISTEN  = 36.18
-
-        if txPower == 14:
-            CONSUMPTION_CPU_ACTIVE_RADIO_TX = 91.94
-            CONSUMPTION_CPU_SLEEP_RADIO_TX  = 88.25
-        elif txPower == 0:
-            CONSUMPTION_CPU_ACTIVE_RADIO_TX = 54.26
-            CONSUMPTION_CPU_SLEEP_RADIO_TX  = 50.24
-        else:
-            raise RuntimeError("Unsupported txPower value")
-
         DelayTx          =  14 / 32768.0 * 1000000   #  427us
         DelayRx          =   0 / 32768.0 * 1000000   #    0us
         MaxTxDataPrepare =  66 / 32768.0 * 1000000   # 2014us
@@ -78,8 +117,9 @@ def Model(radio = 'CC2538', txPower = 0):
     DurationRT1 = TsTxOffset - TsLongGT - DelayRx - MaxRxDataPrepare
     DurationRT5 = TsTxAckDelay - DelayTx - MaxTxAckPrepare
 
-    def calcConsumption(slotType, packetSize=0):
-        consumption = 0
+    # Phases of a single slot as (name, duration in us, CPU/radio state)
+    def calcPhases(slotType, packetSize=0):
+        phases = []
 
         if slotType == SlotType.TxDataRxAck:
             if radio == 'CC2538':
@@ -122,24 +162,24 @@ def Model(radio = 'CC2538', txPower = 0):
                 DurationTxProc            = 619  # ti9
                 DurationSleep             = TsSlotDuration - DurationTxProc - DurationRxAck - DurationRxAckStart - TsTxAckDelay - DurationTxData - DurationTxDataStart - TsTxOffset
 
-            consumption += DurationTxDataOffsetStart * CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  # ti1
-            consumption += DurationTxDataOffset * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
-            consumption += DurationTxDataPrepare * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ti2
-            consumption += DurationTxDataReady * CONSUMPTION_CPU_SLEEP_RADIO_IDLE
-            consumption += DurationTxDataDelayStart * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ti3
-            consumption += DurationTxDataDelay * CONSUMPTION_CPU_SLEEP_RADIO_TX
-            consumption += DurationTxDataStart * CONSUMPTION_CPU_ACTIVE_RADIO_TX  # ti4
-            consumption += DurationTxData * CONSUMPTION_CPU_SLEEP_RADIO_TX
-            consumption += DurationRxAckOffsetStart * CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  # ti5
-            consumption += DurationRxAckOffset * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
-            consumption += DurationRxAckPrepare * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ti6
-            consumption += DurationRxAckReady * CONSUMPTION_CPU_SLEEP_RADIO_IDLE
-            consumption += DurationRxAckListenStart * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ti7
-            consumption += DurationRxAckListen * CONSUMPTION_CPU_SLEEP_RADIO_LISTEN
-            consumption += DurationRxAckStart * CONSUMPTION_CPU_ACTIVE_RADIO_RX  # ti8
-            consumption += DurationRxAck * CONSUMPTION_CPU_SLEEP_RADIO_RX
-            consumption += DurationTxProc * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ti9
-            consumption += DurationSleep * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
+            phases.append(('TxDataOffsetStart', DurationTxDataOffsetStart, 'CPU_ACTIVE_RADIO_SLEEP'))  # ti1
+            phases.append(('TxDataOffset', DurationTxDataOffset, 'CPU_SLEEP_RADIO_SLEEP'))
+            phases.append(('TxDataPrepare', DurationTxDataPrepare, 'CPU_ACTIVE_RADIO_IDLE'))  # ti2
+            phases.append(('TxDataReady', DurationTxDataReady, 'CPU_SLEEP_RADIO_IDLE'))
+            phases.append(('TxDataDelayStart', DurationTxDataDelayStart, 'CPU_ACTIVE_RADIO_IDLE'))  # ti3
+            phases.append(('TxDataDelay', DurationTxDataDelay, 'CPU_SLEEP_RADIO_TX'))
+            phases.append(('TxDataStart', DurationTxDataStart, 'CPU_ACTIVE_RADIO_TX'))  # ti4
+            phases.append(('TxData', DurationTxData, 'CPU_SLEEP_RADIO_TX'))
+            phases.append(('RxAckOffsetStart', DurationRxAckOffsetStart, 'CPU_ACTIVE_RADIO_SLEEP'))  # ti5
+            phases.append(('RxAckOffset', DurationRxAckOffset, 'CPU_SLEEP_RADIO_SLEEP'))
+            phases.append(('RxAckPrepare', DurationRxAckPrepare, 'CPU_ACTIVE_RADIO_IDLE'))  # ti6
+            phases.append(('RxAckReady', DurationRxAckReady, 'CPU_SLEEP_RADIO_IDLE'))
+            phases.append(('RxAckListenStart', DurationRxAckListenStart, 'CPU_ACTIVE_RADIO_IDLE'))  # ti7
+            phases.append(('RxAckListen', DurationRxAckListen, 'CPU_SLEEP_RADIO_LISTEN'))
+            phases.append(('RxAckStart', DurationRxAckStart, 'CPU_ACTIVE_RADIO_RX'))  # ti8
+            phases.append(('RxAck', DurationRxAck, 'CPU_SLEEP_RADIO_RX'))
+            phases.append(('TxProc', DurationTxProc, 'CPU_ACTIVE_RADIO_IDLE'))  # ti9
+            phases.append(('Sleep', DurationSleep, 'CPU_SLEEP_RADIO_SLEEP'))
 
         elif slotType == SlotType.TxData:
             if radio == 'CC2538':
@@ -166,16 +206,16 @@ def Model(radio = 'CC2538', txPower = 0):
                 DurationTxProc            = 109  # ti5
                 DurationSleep             = TsSlotDuration - DurationTxProc - DurationTxData - DurationTxDataStart - TsTxOffset
 
-            consumption += DurationTxDataOffsetStart * CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  # ti1
-            consumption += DurationTxDataOffset * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
-            consumption += DurationTxDataPrepare * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ti2
-            consumption += DurationTxDataReady * CONSUMPTION_CPU_SLEEP_RADIO_IDLE
-            consumption += DurationTxDataDelayStart * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ti3
-            consumption += DurationTxDataDelay * CONSUMPTION_CPU_SLEEP_RADIO_TX
-            consumption += DurationTxDataStart * CONSUMPTION_CPU_ACTIVE_RADIO_TX  # ti4
-            consumption += DurationTxData * CONSUMPTION_CPU_SLEEP_RADIO_TX
-            consumption += DurationTxProc * CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  # ti5
-            consumption += DurationSleep * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
+            phases.append(('TxDataOffsetStart', DurationTxDataOffsetStart, 'CPU_ACTIVE_RADIO_SLEEP'))  # ti1
+            phases.append(('TxDataOffset', DurationTxDataOffset, 'CPU_SLEEP_RADIO_SLEEP'))
+            phases.append(('TxDataPrepare', DurationTxDataPrepare, 'CPU_ACTIVE_RADIO_IDLE'))  # ti2
+            phases.append(('TxDataReady', DurationTxDataReady, 'CPU_SLEEP_RADIO_IDLE'))
+            phases.append(('TxDataDelayStart', DurationTxDataDelayStart, 'CPU_ACTIVE_RADIO_IDLE'))  # ti3
+            phases.append(('TxDataDelay', DurationTxDataDelay, 'CPU_SLEEP_RADIO_TX'))
+            phases.append(('TxDataStart', DurationTxDataStart, 'CPU_ACTIVE_RADIO_TX'))  # ti4
+            phases.append(('TxData', DurationTxData, 'CPU_SLEEP_RADIO_TX'))
+            phases.append(('TxProc', DurationTxProc, 'CPU_ACTIVE_RADIO_SLEEP'))  # ti5
+            phases.append(('Sleep', DurationSleep, 'CPU_SLEEP_RADIO_SLEEP'))
 
         elif slotType == SlotType.TxDataRxAckMissing:
             if radio == 'CC2538':
@@ -214,22 +254,22 @@ def Model(radio = 'CC2538', txPower = 0):
                 DurationTxProc            = 137  # tie5
                 DurationSleep             = TsSlotDuration - DurationTxProc - TsShortGT - TsTxAckDelay - DurationTxData - DurationTxDataStart - TsTxOffset
 
-            consumption += DurationTxDataOffsetStart * CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  # ti1
-            consumption += DurationTxDataOffset * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
-            consumption += DurationTxDataPrepare * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ti2
-            consumption += DurationTxDataReady * CONSUMPTION_CPU_SLEEP_RADIO_IDLE
-            consumption += DurationTxDataDelayStart * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ti3
-            consumption += DurationTxDataDelay * CONSUMPTION_CPU_SLEEP_RADIO_TX
-            consumption += DurationTxDataStart * CONSUMPTION_CPU_ACTIVE_RADIO_TX  # ti4
-            consumption += DurationTxData * CONSUMPTION_CPU_SLEEP_RADIO_TX
-            consumption += DurationRxAckOffsetStart * CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  # ti5
-            consumption += DurationRxAckOffset * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
-            consumption += DurationRxAckPrepare * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ti6
-            consumption += DurationRxAckReady * CONSUMPTION_CPU_SLEEP_RADIO_IDLE
-            consumption += DurationRxAckListenStart * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ti7
-            consumption += DurationRxAckListen * CONSUMPTION_CPU_SLEEP_RADIO_LISTEN
-            consumption += DurationTxProc * CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  # ti9
-            consumption += DurationSleep * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
+            phases.append(('TxDataOffsetStart', DurationTxDataOffsetStart, 'CPU_ACTIVE_RADIO_SLEEP'))  # ti1
+            phases.append(('TxDataOffset', DurationTxDataOffset, 'CPU_SLEEP_RADIO_SLEEP'))
+            phases.append(('TxDataPrepare', DurationTxDataPrepare, 'CPU_ACTIVE_RADIO_IDLE'))  # ti2
+            phases.append(('TxDataReady', DurationTxDataReady, 'CPU_SLEEP_RADIO_IDLE'))
+            phases.append(('TxDataDelayStart', DurationTxDataDelayStart, 'CPU_ACTIVE_RADIO_IDLE'))  # ti3
+            phases.append(('TxDataDelay', DurationTxDataDelay, 'CPU_SLEEP_RADIO_TX'))
+            phases.append(('TxDataStart', DurationTxDataStart, 'CPU_ACTIVE_RADIO_TX'))  # ti4
+            phases.append(('TxData', DurationTxData, 'CPU_SLEEP_RADIO_TX'))
+            phases.append(('RxAckOffsetStart', DurationRxAckOffsetStart, 'CPU_ACTIVE_RADIO_SLEEP'))  # ti5
+            phases.append(('RxAckOffset', DurationRxAckOffset, 'CPU_SLEEP_RADIO_SLEEP'))
+            phases.append(('RxAckPrepare', DurationRxAckPrepare, 'CPU_ACTIVE_RADIO_IDLE'))  # ti6
+            phases.append(('RxAckReady', DurationRxAckReady, 'CPU_SLEEP_RADIO_IDLE'))
+            phases.append(('RxAckListenStart', DurationRxAckListenStart, 'CPU_ACTIVE_RADIO_IDLE'))  # ti7
+            phases.append(('RxAckListen', DurationRxAckListen, 'CPU_SLEEP_RADIO_LISTEN'))
+            phases.append(('TxProc', DurationTxProc, 'CPU_ACTIVE_RADIO_SLEEP'))  # ti9
+            phases.append(('Sleep', DurationSleep, 'CPU_SLEEP_RADIO_SLEEP'))
 
         elif slotType == SlotType.RxDataTxAck:
             if radio == 'CC2538':
@@ -272,24 +312,24 @@ def Model(radio = 'CC2538', txPower = 0):
                 DurationRxProc            = 135  # ri9
                 DurationSleep             = TsSlotDuration - DurationRxProc - DurationTxAck - DurationTxAckStart - TsTxAckDelay - DurationRxData - DurationRxDataStart - TsTxOffset
 
-            consumption += DurationRxDataOffsetStart * CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  # ri1
-            consumption += DurationRxDataOffset * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
-            consumption += DurationRxDataPrepare * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ri2
-            consumption += DurationRxDataReady * CONSUMPTION_CPU_SLEEP_RADIO_IDLE
-            consumption += DurationRxDataListenStart * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ri3
-            consumption += DurationRxDataListen * CONSUMPTION_CPU_SLEEP_RADIO_LISTEN
-            consumption += DurationRxDataStart * CONSUMPTION_CPU_ACTIVE_RADIO_RX  # ri4
-            consumption += DurationRxData * CONSUMPTION_CPU_SLEEP_RADIO_RX
-            consumption += DurationTxAckOffsetStart * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ri5
-            consumption += DurationTxAckOffset * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
-            consumption += DurationTxAckPrepare * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ri6
-            consumption += DurationTxAckReady * CONSUMPTION_CPU_SLEEP_RADIO_IDLE
-            consumption += DurationTxAckDelayStart * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ri7
-            consumption += DurationTxAckDelay * CONSUMPTION_CPU_SLEEP_RADIO_TX
-            consumption += DurationTxAckStart * CONSUMPTION_CPU_ACTIVE_RADIO_TX  # ri8
-            consumption += DurationTxAck * CONSUMPTION_CPU_SLEEP_RADIO_TX
-            consumption += DurationRxProc * CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  # ri9
-            consumption += DurationSleep * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
+            phases.append(('RxDataOffsetStart', DurationRxDataOffsetStart, 'CPU_ACTIVE_RADIO_SLEEP'))  # ri1
+            phases.append(('RxDataOffset', DurationRxDataOffset, 'CPU_SLEEP_RADIO_SLEEP'))
+            phases.append(('RxDataPrepare', DurationRxDataPrepare, 'CPU_ACTIVE_RADIO_IDLE'))  # ri2
+            phases.append(('RxDataReady', DurationRxDataReady, 'CPU_SLEEP_RADIO_IDLE'))
+            phases.append(('RxDataListenStart', DurationRxDataListenStart, 'CPU_ACTIVE_RADIO_IDLE'))  # ri3
+            phases.append(('RxDataListen', DurationRxDataListen, 'CPU_SLEEP_RADIO_LISTEN'))
+            phases.append(('RxDataStart', DurationRxDataStart, 'CPU_ACTIVE_RADIO_RX'))  # ri4
+            phases.append(('RxData', DurationRxData, 'CPU_SLEEP_RADIO_RX'))
+            phases.append(('TxAckOffsetStart', DurationTxAckOffsetStart, 'CPU_ACTIVE_RADIO_IDLE'))  # ri5
+            phases.append(('TxAckOffset', DurationTxAckOffset, 'CPU_SLEEP_RADIO_SLEEP'))
+            phases.append(('TxAckPrepare', DurationTxAckPrepare, 'CPU_ACTIVE_RADIO_IDLE'))  # ri6
+            phases.append(('TxAckReady', DurationTxAckReady, 'CPU_SLEEP_RADIO_IDLE'))
+            phases.append(('TxAckDelayStart', DurationTxAckDelayStart, 'CPU_ACTIVE_RADIO_IDLE'))  # ri7
+            phases.append(('TxAckDelay', DurationTxAckDelay, 'CPU_SLEEP_RADIO_TX'))
+            phases.append(('TxAckStart', DurationTxAckStart, 'CPU_ACTIVE_RADIO_TX'))  # ri8
+            phases.append(('TxAck', DurationTxAck, 'CPU_SLEEP_RADIO_TX'))
+            phases.append(('RxProc', DurationRxProc, 'CPU_ACTIVE_RADIO_SLEEP'))  # ri9
+            phases.append(('Sleep', DurationSleep, 'CPU_SLEEP_RADIO_SLEEP'))
 
         elif slotType == SlotType.RxData:
             if radio == 'CC2538':
@@ -316,16 +356,16 @@ def Model(radio = 'CC2538', txPower = 0):
                 DurationRxProc            = 30 + (190 + (packetSize * 8.439)) + 268  # ri5
                 DurationSleep             = TsSlotDuration - DurationRxProc - DurationRxData - DurationRxDataStart - TsTxOffset
 
-            consumption += DurationRxDataOffsetStart * CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  # ri1
-            consumption += DurationRxDataOffset * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
-            consumption += DurationRxDataPrepare * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ri2
-            consumption += DurationRxDataReady * CONSUMPTION_CPU_SLEEP_RADIO_IDLE
-            consumption += DurationRxDataListenStart * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ri3
-            consumption += DurationRxDataListen * CONSUMPTION_CPU_SLEEP_RADIO_LISTEN
-            consumption += DurationRxDataStart * CONSUMPTION_CPU_ACTIVE_RADIO_RX  # ri4
-            consumption += DurationRxData * CONSUMPTION_CPU_SLEEP_RADIO_RX
-            consumption += DurationRxProc * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ri5
-            consumption += DurationSleep * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
+            phases.append(('RxDataOffsetStart', DurationRxDataOffsetStart, 'CPU_ACTIVE_RADIO_SLEEP'))  # ri1
+            phases.append(('RxDataOffset', DurationRxDataOffset, 'CPU_SLEEP_RADIO_SLEEP'))
+            phases.append(('RxDataPrepare', DurationRxDataPrepare, 'CPU_ACTIVE_RADIO_IDLE'))  # ri2
+            phases.append(('RxDataReady', DurationRxDataReady, 'CPU_SLEEP_RADIO_IDLE'))
+            phases.append(('RxDataListenStart', DurationRxDataListenStart, 'CPU_ACTIVE_RADIO_IDLE'))  # ri3
+            phases.append(('RxDataListen', DurationRxDataListen, 'CPU_SLEEP_RADIO_LISTEN'))
+            phases.append(('RxDataStart', DurationRxDataStart, 'CPU_ACTIVE_RADIO_RX'))  # ri4
+            phases.append(('RxData', DurationRxData, 'CPU_SLEEP_RADIO_RX'))
+            phases.append(('RxProc', DurationRxProc, 'CPU_ACTIVE_RADIO_IDLE'))  # ri5
+            phases.append(('Sleep', DurationSleep, 'CPU_SLEEP_RADIO_SLEEP'))
 
         elif slotType == SlotType.RxIdle:
             if radio == 'CC2538':
@@ -348,49 +388,378 @@ def Model(radio = 'CC2538', txPower = 0):
                 DurationRxProc            = 118  # rie2
                 DurationSleep             = TsSlotDuration - DurationRxProc - TsLongGT - TsTxOffset
 
-            consumption += DurationRxDataOffsetStart * CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  # ri1
-            consumption += DurationRxDataOffset * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
-            consumption += DurationRxDataPrepare * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ri2
-            consumption += DurationRxDataReady * CONSUMPTION_CPU_SLEEP_RADIO_IDLE
-            consumption += DurationRxDataListenStart * CONSUMPTION_CPU_ACTIVE_RADIO_IDLE  # ri3
-            consumption += DurationRxDataListen * CONSUMPTION_CPU_SLEEP_RADIO_LISTEN
-            consumption += DurationRxProc * CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  # rie2
-            consumption += DurationSleep * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
+            phases.append(('RxDataOffsetStart', DurationRxDataOffsetStart, 'CPU_ACTIVE_RADIO_SLEEP'))  # ri1
+            phases.append(('RxDataOffset', DurationRxDataOffset, 'CPU_SLEEP_RADIO_SLEEP'))
+            phases.append(('RxDataPrepare', DurationRxDataPrepare, 'CPU_ACTIVE_RADIO_IDLE'))  # ri2
+            phases.append(('RxDataReady', DurationRxDataReady, 'CPU_SLEEP_RADIO_IDLE'))
+            phases.append(('RxDataListenStart', DurationRxDataListenStart, 'CPU_ACTIVE_RADIO_IDLE'))  # ri3
+            phases.append(('RxDataListen', DurationRxDataListen, 'CPU_SLEEP_RADIO_LISTEN'))
+            phases.append(('RxProc', DurationRxProc, 'CPU_ACTIVE_RADIO_SLEEP'))  # rie2
+            phases.append(('Sleep', DurationSleep, 'CPU_SLEEP_RADIO_SLEEP'))
 
         elif slotType == SlotType.Sleep:
             DurationSleepStart = 57
             DurationSleep      = TsSlotDuration - DurationSleepStart
 
-            consumption += DurationSleepStart * CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP
-            consumption += DurationSleep * CONSUMPTION_CPU_SLEEP_RADIO_SLEEP
+            phases.append(('SleepStart', DurationSleepStart, 'CPU_ACTIVE_RADIO_SLEEP'))
+            phases.append(('Sleep', DurationSleep, 'CPU_SLEEP_RADIO_SLEEP'))
 
         else:
             raise RuntimeError("Invalid slot type")
 
-        return round(consumption / 1000, 2)  # mA x us / 1000 = uC
+        return phases
+
+    return calcPhases
+
+
+# Phases of one slot as parallel arrays: phase names, CPU/radio states, durations (us) and currents (mA)
+class SlotTimeline:
+    def __init__(self, names, states, durations, currents):
+        self.names = names
+        self.states = states
+        self.durations = durations
+        self.currents = currents
+        self.durations.flags.writeable = False
+        self.currents.flags.writeable = False
+        self.sampledWaveforms = {}
+
+    # Unrounded charge of the slot (uC)
+    def charge(self):
+        return float(np.dot(self.durations, self.currents)) / 1000  # mA x us / 1000 = uC
+
+    # Charge of every phase (uC)
+    def phaseCharges(self):
+        return self.durations * self.currents / 1000  # mA x us / 1000 = uC
+
+    # Current (mA) sampled at sampleRate (Hz), sample k is taken at k / sampleRate from the slot start.
+    # Computed once per sample rate, the returned array is read-only.
+    def waveform(self, sampleRate=1e6):
+        if sampleRate not in self.sampledWaveforms:
+            boundaries = np.concatenate(([0], np.cumsum(self.durations))) * sampleRate / 1000000
+            firstSamples = np.ceil(boundaries - 1e-9).astype(np.int64)
+            waveform = np.repeat(self.currents, np.diff(firstSamples))
+            waveform.flags.writeable = False
+            self.sampledWaveforms[sampleRate] = waveform
+        return self.sampledWaveforms[sampleRate]
+
+
+# Immutable model of one radio/txPower/timing/currents configuration, shared through Model()
+class CompiledModel:
+    def __init__(self, radio, txPower, slotDuration, txOffset, txAckDelay, longGuardTime, shortGuardTime, currents):
+        calcPhases = PhaseFunction(radio, slotDuration, txOffset, txAckDelay, longGuardTime, shortGuardTime)
+
+        # Every phase duration is constant or linear in packetSize, so the charge of a slot
+        # is exactly a + b * packetSize (uC), compiled once per configuration
+        coefficients = {}
+        packetSizeLimits = {}
+        for slotType in SLOT_TYPES:
+            phases = calcPhases(slotType, 0)
+            nextPhases = calcPhases(slotType, 1)
+
+            # Phases that do not depend on packetSize must fit the timing template, the others
+            # bound the packet sizes for which the slot is valid
+            minPacketSize, maxPacketSize = -math.inf, math.inf
+            for (name, duration, state), (nextName, nextDuration, nextState) in zip(phases, nextPhases):
+                slope = nextDuration - duration
+                if slope > 0:
+                    minPacketSize = max(minPacketSize, -duration / slope)
+                elif slope < 0:
+                    maxPacketSize = min(maxPacketSize, duration / -slope)
+                elif duration < 0:
+                    raise RuntimeError("Timing template gives the " + name + " phase a negative duration")
+            packetSizeLimits[slotType] = (minPacketSize, maxPacketSize)
+
+            offset = sum(duration * currents[state] for name, duration, state in phases)
+            charge = sum(duration * currents[state] for name, duration, state in nextPhases)
+            coefficients[slotType] = (offset / 1000, (charge - offset) / 1000)  # mA x us / 1000 = uC
+
+        coefficientsA = np.full(len(SLOT_TYPES) + 1, np.nan)
+        coefficientsB = np.full(len(SLOT_TYPES) + 1, np.nan)
+        for slotType, (a, b) in coefficients.items():
+            coefficientsA[slotType] = a
+            coefficientsB[slotType] = b
+        coefficientsA.flags.writeable = False
+        coefficientsB.flags.writeable = False
+
+        minPacketSizes = np.full(len(SLOT_TYPES) + 1, np.nan)
+        maxPacketSizes = np.full(len(SLOT_TYPES) + 1, np.nan)
+        for slotType, (minPacketSize, maxPacketSize) in packetSizeLimits.items():
+            minPacketSizes[slotType] = minPacketSize
+            maxPacketSizes[slotType] = maxPacketSize
+        minPacketSizes.flags.writeable = False
+        maxPacketSizes.flags.writeable = False
+
+        object.__setattr__(self, 'radio', radio)
+        object.__setattr__(self, 'txPower', txPower)
+        object.__setattr__(self, 'timing', (slotDuration, txOffset, txAckDelay, longGuardTime, shortGuardTime))
+        object.__setattr__(self, 'currents', types.MappingProxyType(dict(currents)))
+        object.__setattr__(self, 'coefficients', types.MappingProxyType(coefficients))
+        object.__setattr__(self, 'coefficientsA', coefficientsA)
+        object.__setattr__(self, 'coefficientsB', coefficientsB)
+        object.__setattr__(self, 'packetSizeLimits', types.MappingProxyType(packetSizeLimits))
+        object.__setattr__(self, 'minPacketSizes', minPacketSizes)
+        object.__setattr__(self, 'maxPacketSizes', maxPacketSizes)
+        # Packet sizes valid for every slot type
+        object.__setattr__(self, 'packetSizeRange', (float(np.max(minPacketSizes[1:])), float(np.min(maxPacketSizes[1:]))))
+        object.__setattr__(self, 'calcPhases', calcPhases)
+        object.__setattr__(self, 'timelines', {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledModel is immutable")
+
+    # Pickled by configuration only, unpickling goes through the model cache of the receiving process
+    def __reduce__(self):
+        return (Model, (self.radio, self.txPower) + self.timing + (dict(self.currents),))
+
+    def __call__(self, slotType, packetSize=0):
+        if slotType not in self.coefficients:
+            raise RuntimeError("Invalid slot type")
+        self.checkPacketSize(slotType, packetSize, packetSize)
 
-    return calcConsumption
+        a, b = self.coefficients[slotType]
+        return round(a + b * packetSize, 2)
 
+    # Raises if a packet size between smallest and largest leaves a phase of the slot with a negative duration
+    def checkPacketSize(self, slotType, smallest, largest):
+        minPacketSize, maxPacketSize = self.packetSizeLimits[slotType]
+        if not minPacketSize <= smallest <= largest <= maxPacketSize:
+            raise RuntimeError("Packet size gives a phase of the slot a negative duration")
 
-PACKET_LENGTH = 125  # Excludes CRC, maximum allowed value is 125
+    # Unrounded charges (uC) of whole arrays of slot types and packet sizes
+    def charges(self, slotTypes, packetSizes=0):
+        slotTypes = np.asarray(slotTypes)
+        if np.any((slotTypes < 1) | (slotTypes > len(SLOT_TYPES))):
+            raise RuntimeError("Invalid slot type")
+
+        # Packet sizes within the range of every slot type skip the per slot check
+        packetSizes = np.asarray(packetSizes)
+        minPacketSize, maxPacketSize = self.packetSizeRange
+        if packetSizes.size and not minPacketSize <= packetSizes.min() <= packetSizes.max() <= maxPacketSize:
+            if np.any((packetSizes < self.minPacketSizes[slotTypes]) | (packetSizes > self.maxPacketSizes[slotTypes])):
+                raise RuntimeError("Packet size gives a phase of the slot a negative duration")
 
-def printModelValues(model):
-    print('        TxDataRxAck: ' + str(model(SlotType.TxDataRxAck, PACKET_LENGTH)) + ' uC')
-    print('        RxDataTxAck: ' + str(model(SlotType.RxDataTxAck, PACKET_LENGTH)) + ' uC')
-    print('        TxData: ' + str(model(SlotType.TxData, PACKET_LENGTH)) + ' uC')
-    print('        RxData: ' + str(model(SlotType.RxData, PACKET_LENGTH)) + ' uC')
-    print('        RxIdle: ' + str(model(SlotType.RxIdle, PACKET_LENGTH)) + ' uC')
+        return self.coefficientsA[slotTypes] + self.coefficientsB[slotTypes] * packetSizes
+
+    # Evaluates whole arrays of slot types and packet sizes at once
+    def batch(self, slotTypes, packetSizes=0):
+        return np.round(self.charges(slotTypes, packetSizes), 2)
+
+    # Expected charge of a slot when the packet size follows the given distribution
+    def expected(self, slotType, packetSizes, probabilities=None):
+        if slotType not in self.coefficients:
+            raise RuntimeError("Invalid slot type")
+
+        self.checkPacketSize(slotType, np.min(packetSizes), np.max(packetSizes))
+
+        a, b = self.coefficients[slotType]
+        return round(a + b * np.average(packetSizes, weights=probabilities), 2)
+
+    # Phase timeline of a slot, computed once per slot type and packet size
+    def timeline(self, slotType, packetSize=0):
+        key = (slotType, packetSize)
+        if key not in self.timelines:
+            if slotType not in self.coefficients:
+                raise RuntimeError("Invalid slot type")
+            self.checkPacketSize(slotType, packetSize, packetSize)
+            phases = self.calcPhases(slotType, packetSize)
+            self.timelines[key] = SlotTimeline(tuple(name for name, duration, state in phases),
+                                               tuple(state for name, duration, state in phases),
+                                               np.array([duration for name, duration, state in phases], dtype=np.float64),
+                                               np.array([self.currents[state] for name, duration, state in phases]))
+        return self.timelines[key]
+
+    # Per-phase duration (us), current (mA) and charge (uC) of a slot as a PHASE_DTYPE array
+    def breakdown(self, slotType, packetSize=0):
+        timeline = self.timeline(slotType, packetSize)
+        records = np.zeros(len(timeline.names), dtype=PHASE_DTYPE)
+        records['name'] = timeline.names
+        records['state'] = timeline.states
+        records['duration'] = timeline.durations
+        records['current'] = timeline.currents
+        records['charge'] = timeline.phaseCharges()
+        return records
+
+    # Waveforms of many slots as a (slots x samples) array, each distinct slot is synthesized once
+    def waveforms(self, slotTypes, packetSizes=0, sampleRate=1e6):
+        slotTypes = np.asarray(slotTypes)
+        distinctTypes, distinctSizes, inverse = uniqueSlots(slotTypes, packetSizes)
+
+        waveforms = [self.timeline(slotType, packetSize).waveform(sampleRate) for slotType, packetSize in zip(distinctTypes, distinctSizes)]
+        if len(set(len(waveform) for waveform in waveforms)) > 1:
+            raise RuntimeError("Slots differ in the number of samples")
+
+        return np.stack(waveforms)[inverse].reshape(slotTypes.shape + (-1,))
+
+
+# Distinct (slotType, packetSize) pairs of two arrays, as lists, and the index of every element's pair
+def uniqueSlots(slotTypes, packetSizes=0):
+    slotTypes = np.asarray(slotTypes)
+    packetSizes = np.broadcast_to(packetSizes, slotTypes.shape).ravel()
+    slotTypes = slotTypes.ravel()
+
+    distinctTypes = []
+    distinctSizes = []
+    inverse = np.empty(len(slotTypes), dtype=np.int64)
+    for slotType in np.unique(slotTypes):
+        mask = (slotTypes == slotType)
+        sizes, sizeInverse = np.unique(packetSizes[mask], return_inverse=True)
+        inverse[mask] = len(distinctTypes) + sizeInverse
+        distinctTypes += [int(slotType)] * len(sizes)
+        distinctSizes += sizes.tolist()
+
+    return distinctTypes, distinctSizes, inverse
+
+
+@functools.lru_cache(maxsize=MODEL_CACHE_SIZE)
+def cachedModel(radio, txPower, slotDuration, txOffset, txAckDelay, longGuardTime, shortGuardTime, currents):
+    return CompiledModel(radio, txPower, slotDuration, txOffset, txAckDelay, longGuardTime, shortGuardTime, dict(currents))
+
+# currents overrides the measured Currents() of the radio, e.g. with another calibration
+def Model(radio = 'CC2538', txPower = 0, slotDuration = TS_SLOT_DURATION, txOffset = TS_TX_OFFSET,
+          txAckDelay = TS_TX_ACK_DELAY, longGuardTime = TS_LONG_GT, shortGuardTime = TS_SHORT_GT, currents = None):
+    if currents is None:
+        currents = Currents(radio, txPower)
+
+    # Arguments are passed positionally so that equivalent calls share one cache entry
+    return cachedModel(radio, txPower, slotDuration, txOffset, txAckDelay, longGuardTime, shortGuardTime,
+                       tuple(sorted(currents.items())))
+
+def clearModelCache():
+    cachedModel.cache_clear()
+
+# Charges (uC) as int64 picocoulombs, sums and prefix sums of these are exact over any horizon
+def toFixedPoint(charges):
+    return np.rint(np.asarray(charges, dtype=np.float64) * PICOCOULOMB_PER_UC).astype(np.int64)
+
+def fromFixedPoint(picocoulombs):
+    return np.asarray(picocoulombs) / PICOCOULOMB_PER_UC
+
+# Exact bulk aggregation of slots per group (e.g. per node): the slots and packet bytes of every slot type
+# are counted as integers and the charge a * slots + b * packetBytes is only evaluated, unrounded, when read
+class ChargeTotals:
+    def __init__(self, model, groups=0):
+        self.model = model
+        self.slots = np.zeros((groups, len(SLOT_TYPES) + 1), dtype=np.int64)
+        self.packetBytes = np.zeros((groups, len(SLOT_TYPES) + 1), dtype=np.int64)
+
+    def add(self, slotTypes, packetSizes=0, groups=0):
+        slotTypes = np.asarray(slotTypes).ravel()
+        if np.any((slotTypes < 1) | (slotTypes > len(SLOT_TYPES))):
+            raise RuntimeError("Invalid slot type")
+        packetSizes = np.broadcast_to(packetSizes, slotTypes.shape)
+        if np.any(packetSizes != np.rint(packetSizes)):
+            raise RuntimeError("Packet sizes must be whole bytes")
+        groups = np.broadcast_to(groups, slotTypes.shape).astype(np.int64)
+
+        groupCount = max(len(self.slots), int(groups.max()) + 1 if len(groups) else 0)
+        if groupCount > len(self.slots):
+            padding = np.zeros((groupCount - len(self.slots), len(SLOT_TYPES) + 1), dtype=np.int64)
+            self.slots = np.concatenate((self.slots, padding))
+            self.packetBytes = np.concatenate((self.packetBytes, padding))
+
+        index = groups * (len(SLOT_TYPES) + 1) + slotTypes
+        self.slots += np.bincount(index, minlength=self.slots.size).reshape(self.slots.shape)
+        self.packetBytes += np.rint(np.bincount(index, weights=packetSizes, minlength=self.slots.size)).astype(np.int64).reshape(self.slots.shape)
+
+    # Unrounded charge (uC) of every group
+    def charge(self):
+        return self.slots[:, 1:] @ self.model.coefficientsA[1:] + self.packetBytes[:, 1:] @ self.model.coefficientsB[1:]
+
+    # Unrounded charge (uC) of all groups, with compensated summation
+    def total(self):
+        return math.fsum(self.charge())
+
+# Wraps a model and counts the calls per slot type together with a histogram of their packet sizes.
+# Models that are not wrapped pay nothing; everything that is not counted is delegated to the model.
+# A wrapper pickles together with its counts, so process pools (e.g. workers != 1 in
+# schedule.evaluateScenarios) count in copies that stay in the workers. Run such paths with workers=1
+# to count them, or merge() copies that are sent back.
+class InstrumentedModel:
+    def __init__(self, model):
+        self.model = model
+        self.reset()
+
+    # Only reached for attributes the wrapper lacks; 'model' and special names are not delegated
+    # so that copying and unpickling, which look them up before __init__ ran, do not recurse
+    def __getattr__(self, name):
+        if name == 'model' or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def reset(self):
+        self.calls = np.zeros(len(SLOT_TYPES) + 1, dtype=np.int64)
+        self.packetSizes = np.zeros((len(SLOT_TYPES) + 1, PACKET_LENGTH + 1), dtype=np.int64)
+
+    def merge(self, other):
+        self.calls += other.calls
+        self.packetSizes += other.packetSizes
+
+    def count(self, slotTypes, packetSizes):
+        slotTypes = np.asarray(slotTypes).ravel()
+        packetSizes = np.clip(np.rint(np.broadcast_to(packetSizes, slotTypes.shape)), 0, PACKET_LENGTH).astype(np.int64)
+        np.add.at(self.calls, slotTypes, 1)
+        np.add.at(self.packetSizes, (slotTypes, packetSizes), 1)
+
+    def __call__(self, slotType, packetSize=0):
+        consumption = self.model(slotType, packetSize)
+        self.calls[slotType] += 1
+        self.packetSizes[slotType, min(max(int(round(packetSize)), 0), PACKET_LENGTH)] += 1
+        return consumption
+
+    def charges(self, slotTypes, packetSizes=0):
+        charges = self.model.charges(slotTypes, packetSizes)
+        self.count(slotTypes, packetSizes)
+        return charges
+
+    def batch(self, slotTypes, packetSizes=0):
+        return np.round(self.charges(slotTypes, packetSizes), 2)
+
+    # Total charge (uC) per phase of every slot type over all counted slots, with histogram packet sizes
+    def phaseTotals(self):
+        totals = {}
+        for slotType in SLOT_TYPES:
+            if self.calls[slotType] == 0:
+                continue
+
+            records = None
+            for packetSize in np.nonzero(self.packetSizes[slotType])[0]:
+                breakdown = self.model.breakdown(slotType, int(packetSize))
+                if records is None:
+                    records = breakdown.copy()
+                    records['duration'] = 0
+                    records['charge'] = 0
+                records['duration'] += self.packetSizes[slotType, packetSize] * breakdown['duration']
+                records['charge'] += self.packetSizes[slotType, packetSize] * breakdown['charge']
+            totals[slotType] = records
+
+        return totals
+
+
+def printModelValues(model, packetLength=PACKET_LENGTH):
+    print('        TxDataRxAck: ' + str(model(SlotType.TxDataRxAck, packetLength)) + ' uC')
+    print('        RxDataTxAck: ' + str(model(SlotType.RxDataTxAck, packetLength)) + ' uC')
+    print('        TxData: ' + str(model(SlotType.TxData, packetLength)) + ' uC')
+    print('        RxData: ' + str(model(SlotType.RxData, packetLength)) + ' uC')
+    print('        RxIdle: ' + str(model(SlotType.RxIdle, packetLength)) + ' uC')
     print('        Sleep: ' + str(model(SlotType.Sleep)) + ' uC')
-    print('        TxDataRxAckMissing: ' + str(model(SlotType.TxDataRxAckMissing, PACKET_LENGTH)) + ' uC')
-
-print('Packet length: ' + str(PACKET_LENGTH))
-print('CC2538 radio:')
-print('    3 dBm:')
-printModelValues(Model('CC2538', 3))
-print('    0 dBm:')
-printModelValues(Model('CC2538', 0))
-print('CC1200 radio:')
-print('   14 dBm:')
-printModelValues(Model('CC1200', 14))
-print('    0 dBm:')
-printModelValues(Model('CC1200', 0))
+    print('        TxDataRxAckMissing: ' + str(model(SlotType.TxDataRxAckMissing, packetLength)) + ' uC')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Print the charge of every slot type per radio and txPower')
+    parser.add_argument('--packet-length', type=int, default=PACKET_LENGTH, help='packet length excluding CRC (0-125)')
+    args = parser.parse_args(argv)
+
+    print('Packet length: ' + str(args.packet_length))
+    print('CC2538 radio:')
+    print('    3 dBm:')
+    printModelValues(Model('CC2538', 3), args.packet_length)
+    print('    0 dBm:')
+    printModelValues(Model('CC2538', 0), args.packet_length)
+    print('CC1200 radio:')
+    print('   14 dBm:')
+    printModelValues(Model('CC1200', 14), args.packet_length)
+    print('    0 dBm:')
+    printModelValues(Model('CC1200', 0), args.packet_length)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+import concurrent.futures
+import statistics
+import numpy as np
+from model import SlotType, SLOT_TYPES, PACKET_LENGTH
+from schedule import ScheduleEnergy, BATTERY_CAPACITY
+
+SLOTFRAME_LENGTH = 101
+MAX_RETRIES = 3     # retransmissions after the first attempt
+QUEUE_SIZE = 16     # packets a node can hold back for the next epoch
+EPOCH_DURATION = 3600   # s
+HORIZON = 365 * 24 * 3600  # s
+CONFIDENCE = 0.95
+
+# Per-node description of a network with dedicated cells. parents[node] is the index of the node's parent,
+# or -1 if its parent is the sink outside the simulation. Nodes generate rates[node] packets per slotframe
+# and forward everything their children deliver. pdr is the probability that the data frame of a node
+# reaches its parent and ackLoss the probability that the ACK of a received frame is lost. By default a
+# node listens in one RX cell for every TX cell of its children.
+class NetworkScenario:
+    def __init__(self, parents, rates, pdr, ackLoss=0.0, txCells=1, rxCells=None, packetSize=PACKET_LENGTH,
+                 slotframeLength=SLOTFRAME_LENGTH, maxRetries=MAX_RETRIES, burstiness=0.0, queueSize=QUEUE_SIZE):
+        self.parents = np.asarray(parents, dtype=np.int64)
+        nodeCount = len(self.parents)
+        self.rates = np.broadcast_to(np.asarray(rates, dtype=np.float64), (nodeCount,))
+        self.pdr = np.broadcast_to(np.asarray(pdr, dtype=np.float64), (nodeCount,))
+        self.ackLoss = np.broadcast_to(np.asarray(ackLoss, dtype=np.float64), (nodeCount,))
+        self.txCells = np.broadcast_to(np.asarray(txCells, dtype=np.int64), (nodeCount,))
+        if rxCells is None:
+            hasParent = self.parents >= 0
+            rxCells = np.bincount(self.parents[hasParent], weights=self.txCells[hasParent], minlength=nodeCount)
+        self.rxCells = np.broadcast_to(np.asarray(rxCells, dtype=np.int64), (nodeCount,))
+        self.packetSize = np.broadcast_to(np.asarray(packetSize, dtype=np.float64), (nodeCount,))
+        self.slotframeLength = slotframeLength
+        self.maxRetries = maxRetries
+        self.burstiness = burstiness  # squared coefficient of variation of the packet rate of an epoch, 0 is Poisson
+        self.queueSize = queueSize
+
+        if np.any(self.parents >= nodeCount) or np.any(self.parents == np.arange(nodeCount)):
+            raise RuntimeError("Invalid parent")
+        if np.any(self.txCells + self.rxCells > slotframeLength):
+            raise RuntimeError("Cells exceed the slotframe length")
+
+    def nodeCount(self):
+        return len(self.parents)
+
+# Slot counts (nodes x slot types, column slotType) and dropped packets of one replication. Slotframes are
+# simulated in epochs of epochSlotframes: per epoch every node draws its new packets, then its attempts
+# round by round up to maxRetries retransmissions, each round bounded by the TX cells left in the epoch.
+# Packets that did not get a cell wait for the next epoch, together with the packets the children delivered.
+def replicate(task):
+    model, scenario, slotframes, epochSlotframes, seed = task
+    rng = np.random.default_rng(seed)
+    nodeCount = scenario.nodeCount()
+
+    hasParent = scenario.parents >= 0
+    parents = scenario.parents[hasParent]
+    success = scenario.pdr * (1 - scenario.ackLoss)  # the ACK is received
+    ackLost = np.where(success < 1, (scenario.pdr - success) / np.maximum(1 - success, 1e-300), 0)  # data received given no ACK
+
+    counts = np.zeros((nodeCount, len(SLOT_TYPES) + 1), dtype=np.int64)
+    dropped = np.zeros(nodeCount, dtype=np.int64)
+    backlog = np.zeros(nodeCount, dtype=np.int64)
+    forwarded = np.zeros(nodeCount, dtype=np.int64)
+
+    for start in range(0, slotframes, epochSlotframes):
+        frames = min(epochSlotframes, slotframes - start)
+        rates = scenario.rates * frames
+        if scenario.burstiness > 0:
+            rates = rng.gamma(1 / scenario.burstiness, rates * scenario.burstiness)
+
+        active = backlog + forwarded + rng.poisson(rates)
+        budget = scenario.txCells * frames
+        waiting = np.zeros(nodeCount, dtype=np.int64)
+        attempts = np.zeros(nodeCount, dtype=np.int64)
+        acked = np.zeros(nodeCount, dtype=np.int64)
+        for retry in range(scenario.maxRetries + 1):
+            sent = np.minimum(active, budget)
+            waiting += active - sent
+            budget = budget - sent
+            received = rng.binomial(sent, success)
+            attempts += sent
+            acked += received
+            active = sent - received
+
+        backlog = np.minimum(waiting, scenario.queueSize)
+        dropped += active + waiting - backlog
+
+        delivered = acked + rng.binomial(attempts - acked, ackLost)
+        rxCells = scenario.rxCells * frames
+        rxData = np.minimum(np.bincount(parents, weights=delivered[hasParent], minlength=nodeCount).astype(np.int64), rxCells)
+        forwarded = np.bincount(parents, weights=acked[hasParent], minlength=nodeCount).astype(np.int64)
+
+        counts[:, SlotType.TxDataRxAck] += acked
+        counts[:, SlotType.TxDataRxAckMissing] += attempts - acked
+        counts[:, SlotType.RxDataTxAck] += rxData
+        counts[:, SlotType.RxIdle] += rxCells - rxData
+        counts[:, SlotType.Sleep] += frames * scenario.slotframeLength - attempts - rxCells
+
+    return counts, dropped
+
+class LifetimeEstimate:
+    def __init__(self, model, scenario, slotframes, counts, dropped, batteryCapacity):
+        self.slotframes = slotframes
+        self.counts = counts    # replications x nodes x slot types, column slotType
+        self.dropped = dropped  # replications x nodes
+        # Received data is priced with the receiving node's packet size
+        slotCharges = model.charges(np.array(SLOT_TYPES), scenario.packetSize[:, None])
+        self.energy = ScheduleEnergy(model, scenario.slotframeLength,
+                                     (counts[:, :, 1:] * slotCharges).sum(axis=2) / slotframes, batteryCapacity)
+        self.lifetime = self.energy.lifetime  # hours, replications x nodes
+        self.networkLifetime = self.lifetime.min(axis=1)  # hours until the first node runs out
+
+    def networkLifetimeInterval(self, confidence=CONFIDENCE):
+        return confidenceInterval(self.networkLifetime, confidence)
+
+    def nodeLifetimeIntervals(self, confidence=CONFIDENCE):
+        return confidenceInterval(self.lifetime, confidence)
+
+# Mean over the replications (first axis) with the normal confidence interval of the mean, as (mean, low, high)
+def confidenceInterval(values, confidence=CONFIDENCE):
+    mean = values.mean(axis=0)
+    if len(values) < 2:
+        return mean, mean, mean
+
+    halfWidth = statistics.NormalDist().inv_cdf((1 + confidence) / 2) * values.std(axis=0, ddof=1) / np.sqrt(len(values))
+    return mean, mean - halfWidth, mean + halfWidth
+
+# Runs the replications across a process pool, each with its own random stream spawned from seed, so the
+# results only depend on seed and not on the number of workers. The horizon and epochs are given in seconds.
+def simulateLifetime(model, scenario, replications=32, horizon=HORIZON, epochDuration=EPOCH_DURATION, seed=0,
+                     workers=None, batteryCapacity=BATTERY_CAPACITY):
+    slotframeDuration = scenario.slotframeLength * model.timing[0]  # us
+    slotframes = int(horizon * 1e6 // slotframeDuration)
+    epochSlotframes = max(1, int(epochDuration * 1e6 // slotframeDuration))
+
+    seeds = np.random.SeedSequence(seed).spawn(replications)
+    tasks = [(model, scenario, slotframes, epochSlotframes, replicationSeed) for replicationSeed in seeds]
+    if workers == 1:
+        results = [replicate(task) for task in tasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(replicate, tasks))
+
+    counts = np.stack([counts for counts, dropped in results])
+    dropped = np.stack([dropped for counts, dropped in results])
+    return LifetimeEstimate(model, scenario, slotframes, counts, dropped, batteryCapacity)
@@ -1,432 +1,311 @@
+import argparse
+import concurrent.futures
+import hashlib
+import os
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from scipy import interpolate
-
-class SlotType:
-    TxDataRxAck = 1
-    RxDataTxAck = 2
-    TxData      = 3
-    RxData      = 4
-    RxIdle      = 5
-    Sleep       = 6
-    TxDataRxAckMissing = 7
-
-def Model(radio = 'CC2538', txPower = 0):
-    ACK_LENGTH = 27
-    CRC_LENGTH = 2
-
-    TsSlotDuration   = 15000
-    TsTxOffset       = 131 / 32768.0 * 1000000   # 4000us
-    TsTxAckDelay     = 151 / 32768.0 * 1000000   # 4606us
-    TsLongGT         =  43 / 32768.0 * 1000000   # 1300us
-    TsShortGT        =  16 / 32768.0 * 1000000   #  500us
+from model import Model, SlotType, PACKET_LENGTH, uniqueSlots
+
+# matplotlib is only imported once something is drawn, with whatever backend the caller selected
+def loadPyplot():
+    import matplotlib.pyplot as plt
+    return plt
+
+# Selects the non-interactive Agg backend, for processes that only write figures to files:
+# the command line and the rendering pool
+def useFileBackend():
+    import matplotlib
+    matplotlib.use('Agg')
+
+# Current consumption (mA) of every CPU/radio state used for the plots
+def PlotCurrents(radio = 'CC2538', txPower = 0):
+    currents = {}
 
     if radio == 'CC2538':
-        CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  = 18.5253
-        CONSUMPTION_CPU_ACTIVE_RADIO_IDLE   = 18.5253
-        CONSUMPTION_CPU_ACTIVE_RADIO_RX     = 32.1613
-        CONSUMPTION_CPU_ACTIVE_RADIO_LISTEN = 36.0883
-        CONSUMPTION_CPU_SLEEP_RADIO_SLEEP   = 12.1690
-        CONSUMPTION_CPU_SLEEP_RADIO_IDLE    = 12.1690
-        CONSUMPTION_CPU_SLEEP_RADIO_RX      = 25.5274
-        CONSUMPTION_CPU_SLEEP_RADIO_LISTEN  = 29.6143
+        currents['CPU_ACTIVE_RADIO_SLEEP']  = 18.5253
+        currents['CPU_ACTIVE_RADIO_IDLE']   = 18.5253
+        currents['CPU_ACTIVE_RADIO_RX']     = 32.1613
+        currents['CPU_ACTIVE_RADIO_LISTEN'] = 36.0883
+        currents['CPU_SLEEP_RADIO_SLEEP']   = 12.1690
+        currents['CPU_SLEEP_RADIO_IDLE']    = 12.1690
+        currents['CPU_SLEEP_RADIO_RX']      = 25.5274
+        currents['CPU_SLEEP_RADIO_LISTEN']  = 29.6143
 
         if txPower == 3:
-            CONSUMPTION_CPU_ACTIVE_RADIO_TX = 37.9312
-            CONSUMPTION_CPU_SLEEP_RADIO_TX  = 31.4720
+            currents['CPU_ACTIVE_RADIO_TX'] = 37.9312
+            currents['CPU_SLEEP_RADIO_TX']  = 31.4720
         elif txPower == 0:
-            CONSUMPTION_CPU_ACTIVE_RADIO_TX = 36.1228
-            CONSUMPTION_CPU_SLEEP_RADIO_TX  = 29.6779
+            currents['CPU_ACTIVE_RADIO_TX'] = 36.1228
+            currents['CPU_SLEEP_RADIO_TX']  = 29.6779
         else:
             raise RuntimeError("Unsupported txPower value")
 
-        DelayTx          =  12 / 32768.0 * 1000000   #  366us
-        DelayRx          =   0 / 32768.0 * 1000000   #    0us
-        MaxTxDataPrepare =  66 / 32768.0 * 1000000   # 2014us
-        MaxRxDataPrepare =  33 / 32768.0 * 1000000   # 1007us
-        MaxTxAckPrepare  =  22 / 32768.0 * 1000000   #  671us
-        MaxRxAckPrepare  =  10 / 32768.0 * 1000000   #  305us
-
     elif radio == 'CC1200':
-        CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP  = 18.5977
-        CONSUMPTION_CPU_ACTIVE_RADIO_IDLE   = 21.0067
-        CONSUMPTION_CPU_ACTIVE_RADIO_RX     = 57.3220
-        CONSUMPTION_CPU_ACTIVE_RADIO_LISTEN = 43.3729
-        CONSUMPTION_CPU_SLEEP_RADIO_SLEEP   = 12.4005
-        CONSUMPTION_CPU_SLEEP_RADIO_IDLE    = 15.0322
-        CONSUMPTION_CPU_SLEEP_RADIO_RX      = 50.7769
-        CONSUMPTION_CPU_SLEEP_RADIO_LISTEN  = 38.2895
+        currents['CPU_ACTIVE_RADIO_SLEEP']  = 18.5977
+        currents['CPU_ACTIVE_RADIO_IDLE']   = 21.0067
+        currents['CPU_ACTIVE_RADIO_RX']     = 57.3220
+        currents['CPU_ACTIVE_RADIO_LISTEN'] = 43.3729
+        currents['CPU_SLEEP_RADIO_SLEEP']   = 12.4005
+        currents['CPU_SLEEP_RADIO_IDLE']    = 15.0322
+        currents['CPU_SLEEP_RADIO_RX']      = 50.7769
+        currents['CPU_SLEEP_RADIO_LISTEN']  = 38.2895
 
         if txPower == 14:
-            CONSUMPTION_CPU_ACTIVE_RADIO_TX = 102.7338
-            CONSUMPTION_CPU_SLEEP_RADIO_TX  = 96.6123
+            currents['CPU_ACTIVE_RADIO_TX'] = 102.7338
+            currents['CPU_SLEEP_RADIO_TX']  = 96.6123
         elif txPower == 0:
-            CONSUMPTION_CPU_ACTIVE_RADIO_TX = 59.3448
-            CONSUMPTION_CPU_SLEEP_RADIO_TX  = 53.6732
+            currents['CPU_ACTIVE_RADIO_TX'] = 59.3448
+            currents['CPU_SLEEP_RADIO_TX']  = 53.6732
         else:
             raise RuntimeError("Unsupported txPower value")
 
-        DelayTx          =  14 / 32768.0 * 1000000   #  427us
-        DelayRx          =   0 / 32768.0 * 1000000   #    0us
-        MaxTxDataPrepare =  66 / 32768.0 * 1000000   # 2014us
-        MaxRxDataPrepare =  33 / 32768.0 * 1000000   # 1007us
-        MaxTxAckPrepare  =  33 / 32768.0 * 1000000   # 1007us
-        MaxRxAckPrepare  =  30 / 32768.0 * 1000000   #  915us
-
     else:
         raise RuntimeError("Unsupported radio specified")
 
-    DurationTT1 = TsTxOffset - DelayTx - MaxTxDataPrepare
-    DurationTT5 = TsTxAckDelay - TsShortGT - DelayRx - MaxRxAckPrepare
-
-    DurationRT1 = TsTxOffset - TsLongGT - DelayRx - MaxRxDataPrepare
-    DurationRT5 = TsTxAckDelay - DelayTx - MaxTxAckPrepare
-
-    class State:
-        def __init__(self):
-            self.points = [[0, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP]]
-            self.offset = 0
-
-    def plot(slotType, packetSize=0):
-        consumption = 0
-
-        state = State()
-        def addLine(state, width, consumption):
-            width = round(width)
-            state.points += [[state.offset+1, consumption], [state.offset+width, consumption]]
-            state.offset += width
-
-        if slotType == SlotType.TxDataRxAck:
-            if radio == 'CC2538':
-                DurationTxDataOffsetStart = 105  # ti1
-                DurationTxDataOffset      = DurationTT1 - DurationTxDataOffsetStart
-                DurationTxDataPrepare     = 33 + (5 + packetSize * 0.875) + 22  # ti2
-                DurationTxDataReady       = MaxTxDataPrepare - DurationTxDataPrepare
-                DurationTxDataDelayStart  = 17  # ti3
-                DurationTxDataDelay       = DelayTx - DurationTxDataDelayStart
-                DurationTxDataStart       = 16  # ti4
-                DurationTxData            = (1 + packetSize + CRC_LENGTH) * 32 - DurationTxDataStart
-                DurationRxAckOffsetStart  = 32  # ti5
-                DurationRxAckOffset       = DurationTT5 - DurationRxAckOffsetStart
-                DurationRxAckPrepare      = 38  # ti6
-                DurationRxAckReady        = MaxRxAckPrepare - DurationRxAckPrepare
-                DurationRxAckListenStart  = 17  # ti7
-                DurationRxAckListen       = DelayRx + TsShortGT - DurationRxAckListenStart
-                DurationRxAckStart        = 16  # ti8
-                DurationRxAck             = (1 + ACK_LENGTH) * 32 - DurationRxAckStart
-                DurationTxProc            = 225  # ti9
-                DurationSleep             = TsSlotDuration - DurationTxProc - DurationRxAck - DurationRxAckStart - TsTxAckDelay - DurationTxData - DurationTxDataStart - TsTxOffset
-
-            elif radio == 'CC1200':
-                DurationTxDataOffsetStart = 105  # ti1
-                DurationTxDataOffset      = DurationTT1 - DurationTxDataOffsetStart
-                DurationTxDataPrepare     = 291 + (69 + packetSize * 8.152) + 378  # ti2
-                DurationTxDataReady       = MaxTxDataPrepare - DurationTxDataPrepare
-                DurationTxDataDelayStart  = 58  # ti3
-                DurationTxDataDelay       = DelayTx - DurationTxDataDelayStart
-                DurationTxDataStart       = 16  # ti4
-                DurationTxData            = (1 + packetSize + CRC_LENGTH) * 32 - DurationTxDataStart
-                DurationRxAckOffsetStart  = 75  # ti5
-                DurationRxAckOffset       = DurationTT5 - DurationRxAckOffsetStart
-                DurationRxAckPrepare      = 587  # ti6
-                DurationRxAckReady        = MaxRxAckPrepare - DurationRxAckPrepare
-                DurationRxAckListenStart  = 58  # ti7
-                DurationRxAckListen       = DelayRx + TsShortGT - DurationRxAckListenStart
-                DurationRxAckStart        = 15  # ti8
-                DurationRxAck             = (1 + ACK_LENGTH) * 32 - DurationRxAckStart
-                DurationTxProc            = 619  # ti9
-                DurationSleep             = TsSlotDuration - DurationTxProc - DurationRxAck - DurationRxAckStart - TsTxAckDelay - DurationTxData - DurationTxDataStart - TsTxOffset
-
-            addLine(state, DurationTxDataOffsetStart, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP)  # ti1
-            addLine(state, DurationTxDataOffset, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-            addLine(state, DurationTxDataPrepare, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ti2
-            addLine(state, DurationTxDataReady, CONSUMPTION_CPU_SLEEP_RADIO_IDLE)
-            addLine(state, DurationTxDataDelayStart, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ti3
-            addLine(state, DurationTxDataDelay, CONSUMPTION_CPU_SLEEP_RADIO_TX)
-            addLine(state, DurationTxDataStart, CONSUMPTION_CPU_ACTIVE_RADIO_TX)  # ti4
-            addLine(state, DurationTxData, CONSUMPTION_CPU_SLEEP_RADIO_TX)
-            addLine(state, DurationRxAckOffsetStart, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP)  # ti5
-            addLine(state, DurationRxAckOffset, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-            addLine(state, DurationRxAckPrepare, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ti6
-            addLine(state, DurationRxAckReady, CONSUMPTION_CPU_SLEEP_RADIO_IDLE)
-            addLine(state, DurationRxAckListenStart, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ti7
-            addLine(state, DurationRxAckListen, CONSUMPTION_CPU_SLEEP_RADIO_LISTEN)
-            addLine(state, DurationRxAckStart, CONSUMPTION_CPU_ACTIVE_RADIO_RX)  # ti8
-            addLine(state, DurationRxAck, CONSUMPTION_CPU_SLEEP_RADIO_RX)
-            addLine(state, DurationTxProc, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ti9
-            addLine(state, DurationSleep, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-
-        elif slotType == SlotType.TxData:
-            if radio == 'CC2538':
-                DurationTxDataOffsetStart = 105  # ti1
-                DurationTxDataOffset      = DurationTT1 - DurationTxDataOffsetStart
-                DurationTxDataPrepare     = 33 + (5 + packetSize * 0.875) + 22  # ti2
-                DurationTxDataReady       = MaxTxDataPrepare - DurationTxDataPrepare
-                DurationTxDataDelayStart  = 17  # ti3
-                DurationTxDataDelay       = DelayTx - DurationTxDataDelayStart
-                DurationTxDataStart       = 16  # ti4
-                DurationTxData            = (1 + packetSize + CRC_LENGTH) * 32 - DurationTxDataStart
-                DurationTxProc            = 72  # ti5
-                DurationSleep             = TsSlotDuration - DurationTxProc - DurationTxData - DurationTxDataStart - TsTxOffset
-
-            elif radio == 'CC1200':
-                DurationTxDataOffsetStart = 105  # ti1
-                DurationTxDataOffset      = DurationTT1 - DurationTxDataOffsetStart
-                DurationTxDataPrepare     = 291 + (69 + packetSize * 8.152) + 378  # ti2
-                DurationTxDataReady       = MaxTxDataPrepare - DurationTxDataPrepare
-                DurationTxDataDelayStart  = 58  # ti3
-                DurationTxDataDelay       = DelayTx - DurationTxDataDelayStart
-                DurationTxDataStart       = 16  # ti4
-                DurationTxData            = (1 + packetSize + CRC_LENGTH) * 32 - DurationTxDataStart
-                DurationTxProc            = 109  # ti5
-                DurationSleep             = TsSlotDuration - DurationTxProc - DurationTxData - DurationTxDataStart - TsTxOffset
-
-            addLine(state, DurationTxDataOffsetStart, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP)  # ti1
-            addLine(state, DurationTxDataOffset, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-            addLine(state, DurationTxDataPrepare, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ti2
-            addLine(state, DurationTxDataReady, CONSUMPTION_CPU_SLEEP_RADIO_IDLE)
-            addLine(state, DurationTxDataDelayStart, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ti3
-            addLine(state, DurationTxDataDelay, CONSUMPTION_CPU_SLEEP_RADIO_TX)
-            addLine(state, DurationTxDataStart, CONSUMPTION_CPU_ACTIVE_RADIO_TX)  # ti4
-            addLine(state, DurationTxData, CONSUMPTION_CPU_SLEEP_RADIO_TX)
-            addLine(state, DurationTxProc, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP)  # ti5
-            addLine(state, DurationSleep, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-
-        elif slotType == SlotType.TxDataRxAckMissing:
-            if radio == 'CC2538':
-                DurationTxDataOffsetStart = 105  # ti1
-                DurationTxDataOffset      = DurationTT1 - DurationTxDataOffsetStart
-                DurationTxDataPrepare     = 33 + (5 + packetSize * 0.875) + 22  # ti2
-                DurationTxDataReady       = MaxTxDataPrepare - DurationTxDataPrepare
-                DurationTxDataDelayStart  = 17  # ti3
-                DurationTxDataDelay       = DelayTx - DurationTxDataDelayStart
-                DurationTxDataStart       = 16  # ti4
-                DurationTxData            = (1 + packetSize + CRC_LENGTH) * 32 - DurationTxDataStart
-                DurationRxAckOffsetStart  = 32  # ti5
-                DurationRxAckOffset       = DurationTT5 - DurationRxAckOffsetStart
-                DurationRxAckPrepare      = 38  # ti6
-                DurationRxAckReady        = MaxRxAckPrepare - DurationRxAckPrepare
-                DurationRxAckListenStart  = 17  # ti7
-                DurationRxAckListen       = DelayRx + 2*TsShortGT - DurationRxAckListenStart
-                DurationTxProc            = 44  # tie5
-                DurationSleep             = TsSlotDuration - DurationTxProc - TsShortGT - TsTxAckDelay - DurationTxData - DurationTxDataStart - TsTxOffset
-
-            elif radio == 'CC1200':
-                DurationTxDataOffsetStart = 105  # ti1
-                DurationTxDataOffset      = DurationTT1 - DurationTxDataOffsetStart
-                DurationTxDataPrepare     = 291 + (69 + packetSize * 8.152) + 378  # ti2
-                DurationTxDataReady       = MaxTxDataPrepare - DurationTxDataPrepare
-                DurationTxDataDelayStart  = 58  # ti3
-                DurationTxDataDelay       = DelayTx - DurationTxDataDelayStart
-                DurationTxDataStart       = 16  # ti4
-                DurationTxData            = (1 + packetSize + CRC_LENGTH) * 32 - DurationTxDataStart
-                DurationRxAckOffsetStart  = 75  # ti5
-                DurationRxAckOffset       = DurationTT5 - DurationRxAckOffsetStart
-                DurationRxAckPrepare      = 587  # ti6
-                DurationRxAckReady        = MaxRxAckPrepare - DurationRxAckPrepare
-                DurationRxAckListenStart  = 58  # ti7
-                DurationRxAckListen       = DelayRx + 2*TsShortGT - DurationRxAckListenStart
-                DurationTxProc            = 137  # tie5
-                DurationSleep             = TsSlotDuration - DurationTxProc - TsShortGT - TsTxAckDelay - DurationTxData - DurationTxDataStart - TsTxOffset
-
-            addLine(state, DurationTxDataOffsetStart, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP)  # ti1
-            addLine(state, DurationTxDataOffset, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-            addLine(state, DurationTxDataPrepare, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ti2
-            addLine(state, DurationTxDataReady, CONSUMPTION_CPU_SLEEP_RADIO_IDLE)
-            addLine(state, DurationTxDataDelayStart, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ti3
-            addLine(state, DurationTxDataDelay, CONSUMPTION_CPU_SLEEP_RADIO_TX)
-            addLine(state, DurationTxDataStart, CONSUMPTION_CPU_ACTIVE_RADIO_TX)  # ti4
-            addLine(state, DurationTxData, CONSUMPTION_CPU_SLEEP_RADIO_TX)
-            addLine(state, DurationRxAckOffsetStart, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP)  # ti5
-            addLine(state, DurationRxAckOffset, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-            addLine(state, DurationRxAckPrepare, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ti6
-            addLine(state, DurationRxAckReady, CONSUMPTION_CPU_SLEEP_RADIO_IDLE)
-            addLine(state, DurationRxAckListenStart, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ti7
-            addLine(state, DurationRxAckListen, CONSUMPTION_CPU_SLEEP_RADIO_LISTEN)
-            addLine(state, DurationTxProc, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP)  # ti9
-            addLine(state, DurationSleep, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-
-        elif slotType == SlotType.RxDataTxAck:
-            if radio == 'CC2538':
-                DurationRxDataOffsetStart = 126  # ri1
-                DurationRxDataOffset      = DurationRT1 - DurationRxDataOffsetStart
-                DurationRxDataPrepare     = 38  # ri2
-                DurationRxDataReady       = MaxRxDataPrepare - DurationRxDataPrepare
-                DurationRxDataListenStart = 17  # ri3
-                DurationRxDataListen      = DelayRx + TsLongGT - DurationRxDataListenStart
-                DurationRxDataStart       = 17  # ri4
-                DurationRxData            = (1 + packetSize + CRC_LENGTH) * 32 - DurationRxDataStart
-                DurationTxAckOffsetStart  = 25 + (7 + (packetSize * 0.91)) + 94 # ri5
-                DurationTxAckOffset       = DurationRT5 - DurationTxAckOffsetStart
-                DurationTxAckPrepare      = 153  # ri6
-                DurationTxAckReady        = MaxTxAckPrepare - DurationTxAckPrepare
-                DurationTxAckDelayStart   = 17  # ri7
-                DurationTxAckDelay        = DelayTx - DurationTxAckDelayStart
-                DurationTxAckStart        = 16  # ri8
-                DurationTxAck             = (1 + ACK_LENGTH) * 32 - DurationTxAckStart
-                DurationRxProc            = 94  # ri9
-                DurationSleep             = TsSlotDuration - DurationRxProc - DurationTxAck - DurationTxAckStart - TsTxAckDelay - DurationRxData - DurationRxDataStart - TsTxOffset
-
-            elif radio == 'CC1200':
-                DurationRxDataOffsetStart = 126  # ri1
-                DurationRxDataOffset      = DurationRT1 - DurationRxDataOffsetStart
-                DurationRxDataPrepare     = 676  # ri2
-                DurationRxDataReady       = MaxRxDataPrepare - DurationRxDataPrepare
-                DurationRxDataListenStart = 58  # ri3
-                DurationRxDataListen      = DelayRx + TsLongGT - DurationRxDataListenStart
-                DurationRxDataStart       = 15  # ri4
-                DurationRxData            = (1 + packetSize + CRC_LENGTH) * 32 - DurationRxDataStart
-                DurationTxAckOffsetStart  = 30 + (190 + (packetSize * 8.439)) + 142  # ri5
-                DurationTxAckOffset       = DurationRT5 - DurationTxAckOffsetStart
-                DurationTxAckPrepare      = 930  # ri6
-                DurationTxAckReady        = MaxTxAckPrepare - DurationTxAckPrepare
-                DurationTxAckDelayStart   = 58  # ri7
-                DurationTxAckDelay        = DelayTx - DurationTxAckDelayStart
-                DurationTxAckStart        = 15  # ri8
-                DurationTxAck             = (1 + ACK_LENGTH) * 32 - DurationTxAckStart
-                DurationRxProc            = 135  # ri9
-                DurationSleep             = TsSlotDuration - DurationRxProc - DurationTxAck - DurationTxAckStart - TsTxAckDelay - DurationRxData - DurationRxDataStart - TsTxOffset
-
-            addLine(state, DurationRxDataOffsetStart, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP)  # ri1
-            addLine(state, DurationRxDataOffset, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-            addLine(state, DurationRxDataPrepare, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ri2
-            addLine(state, DurationRxDataReady, CONSUMPTION_CPU_SLEEP_RADIO_IDLE)
-            addLine(state, DurationRxDataListenStart, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ri3
-            addLine(state, DurationRxDataListen, CONSUMPTION_CPU_SLEEP_RADIO_LISTEN)
-            addLine(state, DurationRxDataStart, CONSUMPTION_CPU_ACTIVE_RADIO_RX)  # ri4
-            addLine(state, DurationRxData, CONSUMPTION_CPU_SLEEP_RADIO_RX)
-            addLine(state, DurationTxAckOffsetStart, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ri5
-            addLine(state, DurationTxAckOffset, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-            addLine(state, DurationTxAckPrepare, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ri6
-            addLine(state, DurationTxAckReady, CONSUMPTION_CPU_SLEEP_RADIO_IDLE)
-            addLine(state, DurationTxAckDelayStart, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ri7
-            addLine(state, DurationTxAckDelay, CONSUMPTION_CPU_SLEEP_RADIO_TX)
-            addLine(state, DurationTxAckStart, CONSUMPTION_CPU_ACTIVE_RADIO_TX)  # ri8
-            addLine(state, DurationTxAck, CONSUMPTION_CPU_SLEEP_RADIO_TX)
-            addLine(state, DurationRxProc, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP)  # ri9
-            addLine(state, DurationSleep, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-
-        elif slotType == SlotType.RxData:
-            if radio == 'CC2538':
-                DurationRxDataOffsetStart = 126  # ri1
-                DurationRxDataOffset      = DurationRT1 - DurationRxDataOffsetStart
-                DurationRxDataPrepare     = 38  # ri2
-                DurationRxDataReady       = MaxRxDataPrepare - DurationRxDataPrepare
-                DurationRxDataListenStart = 17  # ri3
-                DurationRxDataListen      = DelayRx + TsLongGT - DurationRxDataListenStart
-                DurationRxDataStart       = 17  # ri4
-                DurationRxData            = (1 + packetSize + CRC_LENGTH) * 32 - DurationRxDataStart
-                DurationRxProc            = 25 + (7 + (packetSize * 0.91)) + 166  # ri5
-                DurationSleep             = TsSlotDuration - DurationRxProc - DurationRxData - DurationRxDataStart - TsTxOffset
-
-            elif radio == 'CC1200':
-                DurationRxDataOffsetStart = 126  # ri1
-                DurationRxDataOffset      = DurationRT1 - DurationRxDataOffsetStart
-                DurationRxDataPrepare     = 676  # ri2
-                DurationRxDataReady       = MaxRxDataPrepare - DurationRxDataPrepare
-                DurationRxDataListenStart = 58  # ri3
-                DurationRxDataListen      = DelayRx + TsLongGT - DurationRxDataListenStart
-                DurationRxDataStart       = 15  # ri4
-                DurationRxData            = (1 + packetSize + CRC_LENGTH) * 32 - DurationRxDataStart
-                DurationRxProc            = 30 + (190 + (packetSize * 8.439)) + 268  # ri5
-                DurationSleep             = TsSlotDuration - DurationRxProc - DurationRxData - DurationRxDataStart - TsTxOffset
-
-            addLine(state, DurationRxDataOffsetStart, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP)  # ri1
-            addLine(state, DurationRxDataOffset, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-            addLine(state, DurationRxDataPrepare, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ri2
-            addLine(state, DurationRxDataReady, CONSUMPTION_CPU_SLEEP_RADIO_IDLE)
-            addLine(state, DurationRxDataListenStart, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ri3
-            addLine(state, DurationRxDataListen, CONSUMPTION_CPU_SLEEP_RADIO_LISTEN)
-            addLine(state, DurationRxDataStart, CONSUMPTION_CPU_ACTIVE_RADIO_RX)  # ri4
-            addLine(state, DurationRxData, CONSUMPTION_CPU_SLEEP_RADIO_RX)
-            addLine(state, DurationRxProc, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ri5
-            addLine(state, DurationSleep, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-
-        elif slotType == SlotType.RxIdle:
-            if radio == 'CC2538':
-                DurationRxDataOffsetStart = 126  # ri1
-                DurationRxDataOffset      = DurationRT1 - DurationRxDataOffsetStart
-                DurationRxDataPrepare     = 38  # ri2
-                DurationRxDataReady       = MaxRxDataPrepare - DurationRxDataPrepare
-                DurationRxDataListenStart = 17  # ri3
-                DurationRxDataListen      = DelayRx + 2*TsLongGT - DurationRxDataListenStart
-                DurationRxProc            = 25  # rie2
-                DurationSleep             = TsSlotDuration - DurationRxProc - TsLongGT - TsTxOffset
-
-            elif radio == 'CC1200':
-                DurationRxDataOffsetStart = 126  # ri1
-                DurationRxDataOffset      = DurationRT1 - DurationRxDataOffsetStart
-                DurationRxDataPrepare     = 676  # ri2
-                DurationRxDataReady       = MaxRxDataPrepare - DurationRxDataPrepare
-                DurationRxDataListenStart = 58  # ri3
-                DurationRxDataListen      = DelayRx + 2*TsLongGT - DurationRxDataListenStart
-                DurationRxProc            = 118  # rie2
-                DurationSleep             = TsSlotDuration - DurationRxProc - TsLongGT - TsTxOffset
-
-            addLine(state, DurationRxDataOffsetStart, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP)  # ri1
-            addLine(state, DurationRxDataOffset, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-            addLine(state, DurationRxDataPrepare, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ri2
-            addLine(state, DurationRxDataReady, CONSUMPTION_CPU_SLEEP_RADIO_IDLE)
-            addLine(state, DurationRxDataListenStart, CONSUMPTION_CPU_ACTIVE_RADIO_IDLE)  # ri3
-            addLine(state, DurationRxDataListen, CONSUMPTION_CPU_SLEEP_RADIO_LISTEN)
-            addLine(state, DurationRxProc, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP)  # rie2
-            addLine(state, DurationSleep, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
-
-        elif slotType == SlotType.Sleep:
-            DurationSleepStart = 57
-            DurationSleep      = TsSlotDuration - DurationSleepStart
-
-            addLine(state, DurationSleepStart, CONSUMPTION_CPU_ACTIVE_RADIO_SLEEP)
-            addLine(state, DurationSleep, CONSUMPTION_CPU_SLEEP_RADIO_SLEEP)
+    return currents
 
-        else:
-            raise RuntimeError("Invalid slot type")
+def PlotModel(radio = 'CC2538', txPower = 0):
+    return Model(radio, txPower, currents=PlotCurrents(radio, txPower))
 
-        return state.points
+# Step function points of a slot timeline, every phase is rounded to whole microseconds
+def timelinePoints(timeline):
+    points = [[0, timeline.currents[0]]]
+    offset = 0
+    for duration, current in zip(timeline.durations, timeline.currents):
+        width = round(duration)
+        points += [[offset+1, current], [offset+width, current]]
+        offset += width
 
-    return plot
+    return points
 
 
+OUTPUT_DIR = 'plot-images'
 
-PACKET_LENGTH = 125  # Excludes CRC, maximum allowed value is 125
+# Slot types in the order in which their figures are rendered
+SLOT_TYPE_NAMES = ('TxDataRxAck', 'RxDataTxAck', 'TxData', 'RxData', 'RxIdle', 'Sleep', 'TxDataRxAckMissing')
 
-def draw(radio, power, slotType, points):
-    plt.figure()
-    plt.xlim(0, 15000)
-    plt.xlabel('time (us)')
-    plt.ylabel('current (mA)')
-    plt.title(slotType + ' slot')
+# Everything draw() uses besides the points, so that figureHash() covers it. The points are resampled
+# at np.arange(*samples) us before they are drawn.
+def figureStyle(radio, power):
+    style = {'xlim': (0, 15000), 'samples': (0, 15000, 1), 'line': 'b-', 'dpi': 150,
+             'xlabel': 'time (us)', 'ylabel': 'current (mA)', 'title': '%s slot'}
 
     if radio == 'CC2538':
-        plt.ylim(0, 50)
+        style['ylim'] = (0, 50)
     elif radio == 'CC1200':
         if power == 14:
-            plt.ylim(0, 120)
+            style['ylim'] = (0, 120)
         elif power == 0:
-            plt.ylim(0, 80)
+            style['ylim'] = (0, 80)
+
+    return style
+
+def figurePath(radio, power, slotType, outputDir=OUTPUT_DIR):
+    return os.path.join(outputDir, str(radio) + '-' + str(power) + 'dBm-' + slotType + '.png')
+
+def draw(radio, power, slotType, points, outputDir=OUTPUT_DIR):
+    from scipy import interpolate
+    plt = loadPyplot()
+    style = figureStyle(radio, power)
+
+    plt.figure()
+    plt.xlim(*style['xlim'])
+    plt.xlabel(style['xlabel'])
+    plt.ylabel(style['ylabel'])
+    plt.title(style['title'] % slotType)
+
+    if 'ylim' in style:
+        plt.ylim(*style['ylim'])
 
     x_list = [x for [x, y] in points]
     y_list = [y for [x, y] in points]
 
     f = interpolate.interp1d(x_list, y_list)
-    x = np.arange(0, 15000, 1)
+    x = np.arange(*style['samples'])
     y = f(x)
 
-    plt.plot(x, y, 'b-')
-    plt.savefig('plot-images/' + str(radio) + '-' + str(power) + 'dBm-' + slotType + '.png', dpi=150)
+    plt.plot(x, y, style['line'])
+    plt.savefig(figurePath(radio, power, slotType, outputDir), dpi=style['dpi'])
+    plt.close()
+
+def drawAllStates(radio, power, outputDir=OUTPUT_DIR):
+    os.makedirs(outputDir, exist_ok=True)
+    model = PlotModel(radio, power)
+    for slotType in SLOT_TYPE_NAMES:
+        draw(radio, power, slotType, timelinePoints(model.timeline(getattr(SlotType, slotType), PACKET_LENGTH)), outputDir)
+
+# Hash of everything a figure depends on: model parameters, packet size, plotted points and style
+def figureHash(radio, power, slotType, packetSize=PACKET_LENGTH):
+    model = PlotModel(radio, power)
+    points = timelinePoints(model.timeline(getattr(SlotType, slotType), packetSize))
+    inputs = (radio, power, slotType, packetSize, sorted(model.currents.items()), model.timing,
+              points, sorted(figureStyle(radio, power).items()))
+    return hashlib.sha256(repr(inputs).encode()).hexdigest()
+
+def renderFigure(figure):
+    radio, power, slotType, packetSize, outputDir = figure
+    model = PlotModel(radio, power)
+    draw(radio, power, slotType, timelinePoints(model.timeline(getattr(SlotType, slotType), packetSize)), outputDir)
+
+# Renders the figures of every radio/txPower/slot type across a process pool. A figure is skipped
+# when the hash stored next to it matches its current inputs, unless force is set.
+def renderAll(configurations=(('CC2538', 3), ('CC2538', 0), ('CC1200', 14), ('CC1200', 0)),
+              outputDir=OUTPUT_DIR, workers=None, force=False):
+    os.makedirs(outputDir, exist_ok=True)
+
+    figures = []
+    hashes = []
+    for radio, power in configurations:
+        for slotType in SLOT_TYPE_NAMES:
+            path = figurePath(radio, power, slotType, outputDir)
+            contentHash = figureHash(radio, power, slotType)
+            if not force and os.path.exists(path) and os.path.exists(path + '.sha256'):
+                with open(path + '.sha256') as f:
+                    if f.read().strip() == contentHash:
+                        continue
+
+            figures.append((radio, power, slotType, PACKET_LENGTH, outputDir))
+            hashes.append(contentHash)
+
+    if workers == 1:
+        for figure in figures:
+            renderFigure(figure)
+    elif figures:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=useFileBackend) as executor:
+            list(executor.map(renderFigure, figures))
+
+    for figure, contentHash in zip(figures, hashes):
+        with open(figurePath(*figure[:3], outputDir=outputDir) + '.sha256', 'w') as f:
+            f.write(contentHash + '\n')
+
+    return [figurePath(*figure[:3], outputDir=outputDir) for figure in figures]
+
+# Minimum, maximum and mean of the samples in buckets of bucketSize samples along the last axis,
+# the last bucket may be partial
+def bucketStatistics(samples, bucketSize):
+    buckets = -(-samples.shape[-1] // bucketSize)
+    padded = np.full(samples.shape[:-1] + (buckets * bucketSize,), np.nan)
+    padded[..., :samples.shape[-1]] = samples
+    padded = padded.reshape(samples.shape[:-1] + (buckets, bucketSize))
+    return np.nanmin(padded, axis=-1), np.nanmax(padded, axis=-1), np.nanmean(padded, axis=-1)
+
+# Level-of-detail envelope of a sequence of slots: start time (us), minimum, maximum and mean current
+# (mA) of about `pixels` buckets. Statistics are computed per distinct slot and combined per bucket,
+# so the full waveform is never built and short spikes survive in the maximum.
+def slotEnvelope(model, slotTypes, packetSizes=0, pixels=2000, sampleRate=1e6):
+    distinctTypes, distinctSizes, inverse = uniqueSlots(slotTypes, packetSizes)
+    waveforms = np.stack([model.timeline(slotType, packetSize).waveform(sampleRate) for slotType, packetSize in zip(distinctTypes, distinctSizes)])
+    slotDuration = waveforms.shape[1] / sampleRate * 1000000  # us
+
+    if len(inverse) >= pixels:
+        # Buckets of whole slots, combining the statistics of every distinct slot
+        slotsPerBucket = -(-len(inverse) // pixels)
+        buckets = -(-len(inverse) // slotsPerBucket)
+        firstSlots = np.arange(buckets) * slotsPerBucket
+        counts = np.diff(np.append(firstSlots, len(inverse)))
+        minimum = np.minimum.reduceat(waveforms.min(axis=1)[inverse], firstSlots)
+        maximum = np.maximum.reduceat(waveforms.max(axis=1)[inverse], firstSlots)
+        mean = np.add.reduceat(waveforms.mean(axis=1)[inverse], firstSlots) / counts
+        times = firstSlots * slotDuration
+    else:
+        # Buckets within slots
+        bucketSize = -(-waveforms.shape[1] * len(inverse) // pixels)
+        minimum, maximum, mean = (statistic[inverse].ravel() for statistic in bucketStatistics(waveforms, bucketSize))
+        bucketsPerSlot = -(-waveforms.shape[1] // bucketSize)
+        times = (np.arange(len(minimum)) // bucketsPerSlot * slotDuration
+                 + np.arange(len(minimum)) % bucketsPerSlot * bucketSize / sampleRate * 1000000)
+
+    return times, minimum, maximum, mean
+
+def drawEnvelope(model, slotTypes, packetSizes=0, path=None, title='Slot sequence', pixels=2000, sampleRate=1e6):
+    plt = loadPyplot()
+    times, minimum, maximum, mean = slotEnvelope(model, slotTypes, packetSizes, pixels, sampleRate)
+    unit, scale = ('s', 1e-6) if times[-1] > 1e6 else ('us', 1)
+
+    plt.figure()
+    plt.xlabel('time (' + unit + ')')
+    plt.ylabel('current (mA)')
+    plt.title(title)
+    plt.fill_between(times * scale, minimum, maximum, step='post', color='b', alpha=0.5, linewidth=0)
+    plt.step(times * scale, mean, 'b-', where='post', linewidth=0.5)
+    if path is None:
+        path = os.path.join(OUTPUT_DIR, title + '.png')
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    plt.savefig(path, dpi=150)
     plt.close()
 
-def drawAllStates(radio, power):
-    draw(radio, power, 'TxDataRxAck', Model(radio, power)(SlotType.TxDataRxAck, PACKET_LENGTH))
-    draw(radio, power, 'RxDataTxAck', Model(radio, power)(SlotType.RxDataTxAck, PACKET_LENGTH))
-    draw(radio, power, 'TxData', Model(radio, power)(SlotType.TxData, PACKET_LENGTH))
-    draw(radio, power, 'RxData', Model(radio, power)(SlotType.RxData, PACKET_LENGTH))
-    draw(radio, power, 'RxIdle', Model(radio, power)(SlotType.RxIdle, PACKET_LENGTH))
-    draw(radio, power, 'Sleep', Model(radio, power)(SlotType.Sleep, PACKET_LENGTH))
-    draw(radio, power, 'TxDataRxAckMissing', Model(radio, power)(SlotType.TxDataRxAckMissing, PACKET_LENGTH))
-
-drawAllStates('CC2538', 3)
-drawAllStates('CC2538', 0)
-drawAllStates('CC1200', 14)
-drawAllStates('CC1200', 0)
+# Per-frame network state of (nodes x slots) slot type and packet size arrays: end time of every frame (s),
+# cumulative charge (mC) and average current during the frame (mA) of every node
+def networkFrames(model, slotTypes, packetSizes=0, slotsPerFrame=10000, chunkFrames=64):
+    slotTypes = np.atleast_2d(slotTypes)
+    packetSizes = np.broadcast_to(packetSizes, slotTypes.shape)
+    nodes, slots = slotTypes.shape
+    frames = -(-slots // slotsPerFrame)
+
+    frameCharges = np.zeros((frames, nodes))
+    for firstFrame in range(0, frames, chunkFrames):
+        start = firstFrame * slotsPerFrame
+        end = min(start + chunkFrames * slotsPerFrame, slots)
+        charges = model.charges(slotTypes[:, start:end], packetSizes[:, start:end])
+        frameStarts = np.arange(0, end - start, slotsPerFrame)
+        frameCharges[firstFrame:firstFrame + len(frameStarts)] = np.add.reduceat(charges, frameStarts, axis=1).T
+
+    frameSlots = np.diff(np.append(np.arange(0, slots, slotsPerFrame), slots))
+    times = np.cumsum(frameSlots) * model.timing[0] / 1000000  # s
+    cumulativeCharge = np.cumsum(frameCharges, axis=0) / 1000  # mC
+    current = frameCharges / (frameSlots[:, None] * model.timing[0]) * 1000  # uC / us = A
+    return times, cumulativeCharge, current
+
+# Animates the cumulative charge and current of every node, the frames are precomputed and only the
+# line data is updated per frame with blitting. Saved to path (.gif with Pillow, otherwise ffmpeg) if given,
+# otherwise the figure stays open for plt.show() with the caller's backend.
+def animateNetwork(model, slotTypes, packetSizes=0, slotsPerFrame=10000, path=None, fps=25):
+    plt = loadPyplot()
+    from matplotlib import animation
+    times, cumulativeCharge, current = networkFrames(model, slotTypes, packetSizes, slotsPerFrame)
+    nodes = np.arange(cumulativeCharge.shape[1])
+
+    figure, (chargeAxes, currentAxes) = plt.subplots(2, 1, sharex=True)
+    chargeAxes.set_xlim(-0.5, len(nodes) - 0.5)
+    chargeAxes.set_ylim(0, cumulativeCharge.max() * 1.05)
+    chargeAxes.set_ylabel('charge (mC)')
+    currentAxes.set_ylim(0, current.max() * 1.05)
+    currentAxes.set_ylabel('current (mA)')
+    currentAxes.set_xlabel('node')
+
+    chargeLine, = chargeAxes.plot(nodes, np.zeros(len(nodes)), 'b.', markersize=3)
+    currentLine, = currentAxes.plot(nodes, np.zeros(len(nodes)), 'r.', markersize=3)
+    timeText = chargeAxes.text(0.02, 0.9, '', transform=chargeAxes.transAxes)
+
+    def init():
+        chargeLine.set_ydata(np.zeros(len(nodes)))
+        currentLine.set_ydata(np.zeros(len(nodes)))
+        timeText.set_text('')
+        return chargeLine, currentLine, timeText
+
+    def update(frame):
+        chargeLine.set_ydata(cumulativeCharge[frame])
+        currentLine.set_ydata(current[frame])
+        timeText.set_text('%.1f s' % times[frame])
+        return chargeLine, currentLine, timeText
+
+    result = animation.FuncAnimation(figure, update, frames=len(times), init_func=init, blit=True, interval=1000 / fps)
+    if path is not None:
+        result.save(path, writer='pillow' if path.endswith('.gif') else 'ffmpeg', fps=fps)
+        plt.close(figure)
+
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the current waveform of every slot type per radio and txPower')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--workers', type=int, default=None, help='number of rendering processes')
+    parser.add_argument('--force', action='store_true', help='also render figures whose inputs did not change')
+    args = parser.parse_args(argv)
+
+    useFileBackend()
+    for path in renderAll(outputDir=args.output_dir, workers=args.workers, force=args.force):
+        print(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import concurrent.futures
+import numpy as np
+from model import SlotType
+
+BATTERY_CAPACITY = 2400  # mAh, e.g. two AA cells
+
+class ScheduleEnergy:
+    def __init__(self, model, slotframeLength, chargePerSlotframe, batteryCapacity):
+        slotframeDuration = slotframeLength * model.timing[0]  # us
+
+        self.chargePerSlotframe = chargePerSlotframe  # uC
+        self.averageCurrent     = chargePerSlotframe / slotframeDuration * 1000  # uC / us = A
+        self.chargePerHour      = self.averageCurrent * 3600 / 1000  # mA x s / 1000 = C
+        self.lifetime           = batteryCapacity / self.averageCurrent  # mAh / mA = hours
+
+# Builds the dense (nodes x slotframeLength) slot type and packet size arrays from
+# per-node cell lists of (slotOffset, slotType, packetSize), unused slot offsets sleep
+def buildSchedule(slotframeLength, nodeCells):
+    nodes = sorted(nodeCells)
+    slotTypes = np.full((len(nodes), slotframeLength), SlotType.Sleep, dtype=np.int8)
+    packetSizes = np.zeros((len(nodes), slotframeLength))
+
+    for row, node in enumerate(nodes):
+        for slotOffset, slotType, packetSize in nodeCells[node]:
+            slotTypes[row, slotOffset] = slotType
+            packetSizes[row, slotOffset] = packetSize
+
+    return nodes, slotTypes, packetSizes
+
+# Prices every cell of every node's slotframe in one vectorized pass, one row per node
+def evaluateSchedule(model, slotTypes, packetSizes=0, batteryCapacity=BATTERY_CAPACITY):
+    slotTypes = np.atleast_2d(slotTypes)
+    charges = model.charges(slotTypes, packetSizes)
+    return ScheduleEnergy(model, slotTypes.shape[1], charges.sum(axis=1), batteryCapacity)
+
+# Charge per slotframe of a list of active cells (node index, slot type, packet size), every other
+# slot offset of the node's slotframe is counted as Sleep in bulk so the cost scales with the active cells
+def sparseScheduleCharge(model, slotframeLength, nodeCount, nodeIndices, slotTypes, packetSizes=0):
+    sleepCharge = model.coefficientsA[SlotType.Sleep]
+    cellCharges = model.charges(slotTypes, packetSizes) - sleepCharge
+    return slotframeLength * sleepCharge + np.bincount(nodeIndices, weights=cellCharges, minlength=nodeCount)
+
+def evaluateSparseSchedule(model, slotframeLength, nodeCount, nodeIndices, slotTypes, packetSizes=0,
+                           batteryCapacity=BATTERY_CAPACITY):
+    chargePerSlotframe = sparseScheduleCharge(model, slotframeLength, nodeCount, nodeIndices, slotTypes, packetSizes)
+    return ScheduleEnergy(model, slotframeLength, chargePerSlotframe, batteryCapacity)
+
+# Splits a sparse schedule into shards of consecutive nodes, the cells of every node keep their order
+# so that each shard sums exactly like the unsharded schedule
+def shardSparseSchedule(model, slotframeLength, nodeCount, nodeIndices, slotTypes, packetSizes=0, shardSize=1024):
+    nodeIndices = np.asarray(nodeIndices)
+    order = np.argsort(nodeIndices, kind='stable')
+    nodeIndices = nodeIndices[order]
+    slotTypes = np.asarray(slotTypes)[order]
+    packetSizes = np.broadcast_to(np.asarray(packetSizes, dtype=np.float64), order.shape)[order]
+
+    for first in range(0, nodeCount, shardSize):
+        last = min(first + shardSize, nodeCount)
+        start, end = np.searchsorted(nodeIndices, [first, last])
+        yield (model, slotframeLength, last - first, nodeIndices[start:end] - first, slotTypes[start:end], packetSizes[start:end])
+
+def sparseShardCharge(shard):
+    return sparseScheduleCharge(*shard)
+
+# Evaluates many sparse schedules (model, slotframeLength, nodeCount, nodeIndices, slotTypes, packetSizes),
+# sharded by node across a process pool. Shards are reassembled in input order, so the results do
+# not depend on the number of workers. Models are pickled by configuration and rebuilt from each
+# worker's model cache.
+def evaluateScenarios(scenarios, workers=None, shardSize=1024, batteryCapacity=BATTERY_CAPACITY):
+    scenarios = list(scenarios)
+    shards = []
+    shardCounts = []
+    for scenario in scenarios:
+        scenarioShards = list(shardSparseSchedule(*scenario, shardSize=shardSize))
+        shards += scenarioShards
+        shardCounts.append(len(scenarioShards))
+
+    if workers == 1:
+        charges = [sparseShardCharge(shard) for shard in shards]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            charges = list(executor.map(sparseShardCharge, shards))
+
+    results = []
+    for scenario, shardCount in zip(scenarios, shardCounts):
+        model, slotframeLength = scenario[0], scenario[1]
+        chargePerSlotframe = np.concatenate(charges[:shardCount]) if shardCount else np.zeros(0)
+        charges = charges[shardCount:]
+        results.append(ScheduleEnergy(model, slotframeLength, chargePerSlotframe, batteryCapacity))
+
+    return results
+
+# Keeps only the active cells of every node together with their charge on top of sleeping,
+# so adding or removing a cell updates the node's slotframe charge in O(1)
+class SparseSchedule:
+    def __init__(self, model, slotframeLength, batteryCapacity=BATTERY_CAPACITY):
+        self.model = model
+        self.slotframeLength = slotframeLength
+        self.batteryCapacity = batteryCapacity
+        self.sleepCharge = model.coefficientsA[SlotType.Sleep]
+        self.cells = {}        # node -> {slotOffset: (slotType, packetSize)}
+        self.extraCharge = {}  # node -> charge of the active cells above Sleep (uC)
+
+    def addNode(self, node):
+        if node not in self.cells:
+            self.cells[node] = {}
+            self.extraCharge[node] = 0.0
+
+    def addCell(self, node, slotOffset, slotType, packetSize=0):
+        if not 0 <= slotOffset < self.slotframeLength:
+            raise RuntimeError("Slot offset outside of slotframe")
+        if slotType not in self.model.coefficients:
+            raise RuntimeError("Invalid slot type")
+
+        self.removeCell(node, slotOffset)
+        a, b = self.model.coefficients[slotType]
+        self.cells[node][slotOffset] = (slotType, packetSize)
+        self.extraCharge[node] += a + b * packetSize - self.sleepCharge
+
+    def removeCell(self, node, slotOffset):
+        self.addNode(node)
+        if slotOffset in self.cells[node]:
+            slotType, packetSize = self.cells[node].pop(slotOffset)
+            a, b = self.model.coefficients[slotType]
+            self.extraCharge[node] -= a + b * packetSize - self.sleepCharge
+
+    def nodeCharge(self, node):
+        return self.slotframeLength * self.sleepCharge + self.extraCharge[node]  # uC per slotframe
+
+    def evaluate(self):
+        nodes = list(self.cells)
+        chargePerSlotframe = self.slotframeLength * self.sleepCharge + np.array([self.extraCharge[node] for node in nodes])
+        return nodes, ScheduleEnergy(self.model, self.slotframeLength, chargePerSlotframe, self.batteryCapacity)
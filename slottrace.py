@@ -0,0 +1,202 @@
+import itertools
+import os
+import numpy as np
+from model import SlotType, ChargeTotals, toFixedPoint, fromFixedPoint
+
+# One executed slot: (ASN, node id, slot type, packet size, ack received)
+TRACE_DTYPE = np.dtype([('asn', '<u8'), ('node', '<u4'), ('slotType', 'u1'), ('packetSize', 'u1'), ('ack', 'u1')])
+TRACE_MAGIC = b'TSCHTRC1'
+
+CHUNK_SIZE = 1 << 20  # records
+
+def readCsvTrace(path, chunkSize=CHUNK_SIZE):
+    with open(path) as f:
+        firstLine = f.readline()
+        lines = [] if firstLine[:1].isalpha() else [firstLine]  # optional header
+
+        while True:
+            lines += itertools.islice(f, chunkSize - len(lines))
+            if not lines:
+                break
+            yield np.atleast_1d(np.loadtxt(lines, delimiter=',', dtype=TRACE_DTYPE))
+            lines = []
+
+def readBinaryTrace(path, chunkSize=CHUNK_SIZE):
+    with open(path, 'rb') as f:
+        if f.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise RuntimeError("Not a binary slot trace")
+
+        while True:
+            records = np.fromfile(f, dtype=TRACE_DTYPE, count=chunkSize)
+            if len(records) == 0:
+                break
+            yield records
+
+def writeBinaryTrace(path, chunks):
+    with open(path, 'wb') as f:
+        f.write(TRACE_MAGIC)
+        for records in chunks:
+            np.asarray(records, dtype=TRACE_DTYPE).tofile(f)
+
+def csvToBinaryTrace(csvPath, binaryPath, chunkSize=CHUNK_SIZE):
+    writeBinaryTrace(binaryPath, readCsvTrace(csvPath, chunkSize))
+
+# A TxDataRxAck slot whose ACK did not arrive is priced as TxDataRxAckMissing
+def effectiveSlotTypes(records):
+    slotTypes = records['slotType'].copy()
+    slotTypes[(slotTypes == SlotType.TxDataRxAck) & (records['ack'] == 0)] = SlotType.TxDataRxAckMissing
+    return slotTypes
+
+# Per-node cumulative charge (uC) and slot count over a stream of record chunks, memory only grows
+# with the number of nodes and never with the length of the trace. Slots are counted exactly,
+# so the charge carries no error that grows with the trace length.
+class TraceAccumulator:
+    def __init__(self, model):
+        self.totals = ChargeTotals(model)
+
+    def add(self, records):
+        self.totals.add(effectiveSlotTypes(records), records['packetSize'], records['node'])
+
+    def charge(self):
+        return self.totals.charge()
+
+    def slots(self):
+        return self.totals.slots.sum(axis=1)
+
+def accumulateTrace(model, chunks):
+    accumulator = TraceAccumulator(model)
+    for records in chunks:
+        accumulator.add(records)
+    return accumulator
+
+
+# Columnar on-disk trace: one .npy file per field with the records grouped per node and ordered by
+# ASN within a node, plus the offsets of every node's records. Columns are opened with numpy.memmap,
+# a query for one node and ASN window binary searches the node's ASN column and touches only the
+# pages of that window.
+COLUMNS = ('asn', 'slotType', 'packetSize', 'ack')
+
+# chunks is a callable returning a fresh iterator over the record chunks, it is read twice:
+# once to count the records per node and once to scatter them into the columns
+def writeColumnarTrace(path, chunks):
+    counts = np.zeros(0, dtype=np.int64)
+    for records in chunks():
+        chunkCounts = np.bincount(records['node'])
+        if len(chunkCounts) > len(counts):
+            counts = np.concatenate((counts, np.zeros(len(chunkCounts) - len(counts), dtype=np.int64)))
+        counts[:len(chunkCounts)] += chunkCounts
+
+    nodeOffsets = np.concatenate(([0], np.cumsum(counts)))
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'nodeOffsets.npy'), nodeOffsets)
+    columns = {}
+    for name in COLUMNS:
+        columns[name] = np.lib.format.open_memmap(os.path.join(path, name + '.npy'), mode='w+',
+                                                  dtype=TRACE_DTYPE[name], shape=(int(nodeOffsets[-1]),))
+
+    cursors = nodeOffsets[:-1].copy()
+    for records in chunks():
+        order = np.argsort(records['node'], kind='stable')
+        nodes = records['node'][order]
+        chunkCounts = np.bincount(nodes, minlength=len(counts))
+        chunkStarts = np.concatenate(([0], np.cumsum(chunkCounts)[:-1]))
+        positions = cursors[nodes] + np.arange(len(nodes)) - chunkStarts[nodes]
+        for name in COLUMNS:
+            columns[name][positions] = records[name][order]
+        cursors += chunkCounts
+
+    # Records of a node are expected in ASN order, sort the segments that are not
+    asn = columns['asn']
+    for node in range(len(counts)):
+        start, end = nodeOffsets[node], nodeOffsets[node + 1]
+        if end - start > 1 and np.any(asn[start + 1:end] < asn[start:end - 1]):
+            order = np.argsort(asn[start:end], kind='stable')
+            for name in COLUMNS:
+                columns[name][start:end] = columns[name][start:end][order]
+
+    for name in COLUMNS:
+        columns[name].flush()
+
+def csvToColumnarTrace(csvPath, path, chunkSize=CHUNK_SIZE):
+    writeColumnarTrace(path, lambda: readCsvTrace(csvPath, chunkSize))
+
+def binaryToColumnarTrace(binaryPath, path, chunkSize=CHUNK_SIZE):
+    writeColumnarTrace(path, lambda: readBinaryTrace(binaryPath, chunkSize))
+
+class ColumnarTrace:
+    def __init__(self, path):
+        self.nodeOffsets = np.load(os.path.join(path, 'nodeOffsets.npy'))
+        self.columns = {}
+        for name in COLUMNS:
+            self.columns[name] = np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+
+    def nodeCount(self):
+        return len(self.nodeOffsets) - 1
+
+    # Index range of the records of node with asnStart <= ASN < asnEnd
+    def recordRange(self, node, asnStart=0, asnEnd=None):
+        if node >= self.nodeCount():
+            return 0, 0
+
+        start, end = int(self.nodeOffsets[node]), int(self.nodeOffsets[node + 1])
+        asn = self.columns['asn'][start:end]
+        first = start + int(np.searchsorted(asn, asnStart, side='left'))
+        last = end if asnEnd is None else start + int(np.searchsorted(asn, asnEnd, side='left'))
+        return first, last
+
+    def records(self, node, asnStart=0, asnEnd=None):
+        first, last = self.recordRange(node, asnStart, asnEnd)
+        return dict((name, self.columns[name][first:last]) for name in COLUMNS)
+
+    # Charge (uC) of node with asnStart <= ASN < asnEnd
+    def energy(self, model, node, asnStart=0, asnEnd=None):
+        records = self.records(node, asnStart, asnEnd)
+        return float(np.sum(model.charges(effectiveSlotTypes(records), records['packetSize'])))
+
+    def timeline(self, model, node):
+        records = self.records(node)
+        return EnergyTimeline(model, records['asn'], model.charges(effectiveSlotTypes(records), records['packetSize']))
+
+
+# Prefix sums of the charge of one node's slots, ordered by ASN. Window queries binary search the
+# ASN column and subtract two prefix sums, appending slots extends the index in amortized O(1).
+# Prefix sums are kept in integer picocoulombs so that windows are exact however long the timeline.
+class EnergyTimeline:
+    def __init__(self, model, asns=(), charges=()):
+        self.slotDuration = model.timing[0]  # us
+        self.length = 0
+        self.asn = np.zeros(0, dtype=np.uint64)
+        self.cumulativeCharge = np.zeros(1, dtype=np.int64)  # cumulativeCharge[i] is the charge of the first i slots (pC)
+        self.append(asns, charges)
+
+    def append(self, asns, charges):
+        asns = np.asarray(asns, dtype=np.uint64)
+        charges = toFixedPoint(charges)
+        if len(asns) == 0:
+            return
+        if np.any(asns[1:] < asns[:-1]) or (self.length and asns[0] < self.asn[self.length - 1]):
+            raise RuntimeError("Slots must be appended in ASN order")
+
+        length = self.length + len(asns)
+        if length > len(self.asn):
+            capacity = max(length, 2 * len(self.asn))
+            self.asn = np.concatenate((self.asn[:self.length], np.zeros(capacity - self.length, dtype=np.uint64)))
+            self.cumulativeCharge = np.concatenate((self.cumulativeCharge[:self.length + 1], np.zeros(capacity - self.length, dtype=np.int64)))
+
+        self.asn[self.length:length] = asns
+        self.cumulativeCharge[self.length + 1:length + 1] = self.cumulativeCharge[self.length] + np.cumsum(charges)
+        self.length = length
+
+    def appendSlots(self, model, asns, slotTypes, packetSizes=0):
+        self.append(asns, model.charges(slotTypes, packetSizes))
+
+    # Charge (uC) of the slots with asnStart <= ASN < asnEnd
+    def charge(self, asnStart, asnEnd):
+        asn = self.asn[:self.length]
+        first = np.searchsorted(asn, np.uint64(asnStart), side='left')
+        last = np.searchsorted(asn, np.uint64(asnEnd), side='left')
+        return float(fromFixedPoint(self.cumulativeCharge[last] - self.cumulativeCharge[first]))
+
+    # Average current (mA) over the window, slots missing from the timeline count as zero charge
+    def averageCurrent(self, asnStart, asnEnd):
+        return self.charge(asnStart, asnEnd) / ((asnEnd - asnStart) * self.slotDuration) * 1000  # uC / us = A
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import numpy as np
+from model import (PhaseFunction, Currents, SLOT_TYPES, TX_POWERS, TS_SLOT_DURATION, TS_TX_OFFSET, TS_TX_ACK_DELAY,
+                   TS_LONG_GT, TS_SHORT_GT, PACKET_LENGTH)
+
+TIMING_PARAMETERS = ('slotDuration', 'txOffset', 'txAckDelay', 'longGuardTime', 'shortGuardTime')
+DEFAULT_TIMING = (TS_SLOT_DURATION, TS_TX_OFFSET, TS_TX_ACK_DELAY, TS_LONG_GT, TS_SHORT_GT)
+
+DIMENSIONS = ('configuration', 'slotType', 'packetSize') + TIMING_PARAMETERS
+CACHE_DIR = 'sweep-cache'
+
+TIMING_STEP = 1000  # us, step used to derive the timing coefficients
+
+# Every phase duration is linear in packetSize and in the timing template, so per slot type the durations are
+# constant + packetCoefficient * packetSize + sum(timingCoefficients[k] * timing[k]) (us), one entry per phase.
+# The coefficients follow from the phase tables at the default timing and a step along every timing parameter.
+def phaseCoefficients(radio):
+    def durations(timing, packetSize):
+        calcPhases = PhaseFunction(radio, *timing)
+        return dict((slotType, np.array([duration for name, duration, state in calcPhases(slotType, packetSize)]))
+                    for slotType in SLOT_TYPES)
+
+    calcPhases = PhaseFunction(radio, *DEFAULT_TIMING)
+    offsets = durations(DEFAULT_TIMING, 0)
+    slopes = durations(DEFAULT_TIMING, 1)
+    steps = []
+    for k in range(len(TIMING_PARAMETERS)):
+        timing = list(DEFAULT_TIMING)
+        timing[k] += TIMING_STEP
+        steps.append(durations(timing, 0))
+
+    coefficients = {}
+    for slotType in SLOT_TYPES:
+        states = [state for name, duration, state in calcPhases(slotType, 0)]
+        timingCoefficients = np.array([(step[slotType] - offsets[slotType]) / TIMING_STEP for step in steps])
+        constant = offsets[slotType] - np.dot(DEFAULT_TIMING, timingCoefficients)
+        coefficients[slotType] = (states, constant, slopes[slotType] - offsets[slotType], timingCoefficients)
+    return coefficients
+
+# The charge of a slot follows as constant + packetCoefficient * packetSize + sum(timingCoefficients[k] * timing[k])
+# (uC), per slot type in SLOT_TYPES order
+def affineCoefficients(radio, txPower, currents=None):
+    if currents is None:
+        currents = Currents(radio, txPower)
+
+    charges = []
+    for states, constant, packetCoefficient, timingCoefficients in phaseCoefficients(radio).values():
+        stateCurrents = np.array([currents[state] for state in states])
+        charges.append((np.dot(constant, stateCurrents), np.dot(packetCoefficient, stateCurrents),
+                        np.dot(timingCoefficients, stateCurrents)))
+
+    constant, packetCoefficient, timingCoefficients = (np.array(values) / 1000 for values in zip(*charges))  # mA x us / 1000 = uC
+    return constant, packetCoefficient, timingCoefficients.T
+
+# Shortest phase duration (us) of every slot type over the (packetSize, timing parameters...) grid
+def shortestPhases(radio, coords):
+    expand = (slice(None),) + (None,) * (len(DIMENSIONS) - 2)
+    shortest = []
+    for states, constant, packetCoefficient, timingCoefficients in phaseCoefficients(radio).values():
+        durations = constant[expand] + packetCoefficient[expand] * axis(coords['packetSize'], 0)
+        for k, dim in enumerate(TIMING_PARAMETERS):
+            durations = durations + timingCoefficients[k][expand] * axis(coords[dim], k + 1)
+        shortest.append(durations.min(axis=0))
+    return np.stack(shortest)
+
+# Labelled result of a sweep: charges (uC) with one axis per name in dims and the values along every axis in coords
+class SweepResult:
+    def __init__(self, charges, coords):
+        self.charges = charges
+        self.dims = DIMENSIONS
+        self.coords = coords
+
+    # Sub-array at the given coordinate values, e.g. select(slotType=SlotType.Sleep, packetSize=125)
+    def select(self, **values):
+        index = []
+        for dim in self.dims:
+            if dim in values:
+                index.append(list(self.coords[dim]).index(values[dim]))
+            else:
+                index.append(slice(None))
+        return self.charges[tuple(index)]
+
+def sweepFingerprint(coords, coefficients):
+    digest = hashlib.sha256()
+    for dim in DIMENSIONS:
+        digest.update(repr((dim, list(coords[dim]))).encode())
+    for arrays in coefficients:
+        for array in arrays:
+            digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+# Charges of every slot type over the Cartesian grid of radio/txPower configurations, packet sizes and
+# timing parameters, evaluated in closed form by broadcasting the affine coefficients. Grid points where
+# the timing leaves a phase of the slot with a negative duration cannot occur and are NaN. Results are
+# cached in cacheDir under a fingerprint of the grid and the model coefficients (None disables the cache).
+def sweep(configurations=None, packetSizes=range(PACKET_LENGTH + 1), slotDuration=(TS_SLOT_DURATION,),
+          txOffset=(TS_TX_OFFSET,), txAckDelay=(TS_TX_ACK_DELAY,), longGuardTime=(TS_LONG_GT,),
+          shortGuardTime=(TS_SHORT_GT,), cacheDir=CACHE_DIR):
+    if configurations is None:
+        configurations = [(radio, power) for radio, powers in TX_POWERS.items() for power in powers]
+
+    coords = {'configuration': [tuple(configuration) for configuration in configurations],
+              'slotType': list(SLOT_TYPES),
+              'packetSize': np.asarray(packetSizes, dtype=np.float64),
+              'slotDuration': np.asarray(slotDuration, dtype=np.float64),
+              'txOffset': np.asarray(txOffset, dtype=np.float64),
+              'txAckDelay': np.asarray(txAckDelay, dtype=np.float64),
+              'longGuardTime': np.asarray(longGuardTime, dtype=np.float64),
+              'shortGuardTime': np.asarray(shortGuardTime, dtype=np.float64)}
+    coefficients = [affineCoefficients(radio, power) for radio, power in coords['configuration']]
+
+    path = None
+    if cacheDir is not None:
+        path = os.path.join(cacheDir, sweepFingerprint(coords, coefficients) + '.npy')
+        if os.path.exists(path):
+            return SweepResult(np.load(path, mmap_mode='r'), coords)
+
+    # Axes: configuration, slotType, packetSize, then one per timing parameter
+    shape = (len(coords['configuration']), len(SLOT_TYPES)) + tuple(len(coords[dim]) for dim in DIMENSIONS[2:])
+    charges = np.zeros(shape)
+    for index, (constant, packetCoefficient, timingCoefficients) in enumerate(coefficients):
+        expand = (slice(None),) + (None,) * (len(DIMENSIONS) - 2)
+        charges[index] = constant[expand] + packetCoefficient[expand] * axis(coords['packetSize'], 0)
+        for k, dim in enumerate(TIMING_PARAMETERS):
+            charges[index] += timingCoefficients[k][expand] * axis(coords[dim], k + 1)
+
+    shortest = {}
+    for index, (radio, power) in enumerate(coords['configuration']):
+        if radio not in shortest:
+            shortest[radio] = shortestPhases(radio, coords)
+        charges[index][shortest[radio] < 0] = np.nan
+
+    if path is not None:
+        os.makedirs(cacheDir, exist_ok=True)
+        np.save(path, charges)
+
+    return SweepResult(charges, coords)
+
+# values laid out along grid axis k of the (packetSize, timing parameters...) axes
+def axis(values, k):
+    shape = [1] * (len(DIMENSIONS) - 1)
+    shape[k + 1] = len(values)
+    return np.reshape(values, shape)
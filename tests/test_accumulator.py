@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from model import Model, SlotType
+from accumulator import SlotAccumulator
+
+def test_snapshot_matches_model():
+    model = Model()
+    accumulator = SlotAccumulator(model, 2)
+    accumulator.onSlot(0, SlotType.TxDataRxAck, 100)
+    accumulator.onSlot(0, SlotType.Sleep)
+    accumulator.onSlot(1, SlotType.RxDataTxAck, 20)
+
+    snapshot = accumulator.snapshot()
+    assert snapshot.slots == 3
+    assert np.allclose(snapshot.nodeCharge, [model.charges(SlotType.TxDataRxAck, 100) + model.charges(SlotType.Sleep),
+                                             model.charges(SlotType.RxDataTxAck, 20)])
+
+# A slot type past the last one used to be counted as the next node's slot
+@pytest.mark.parametrize('node,slotType', [(0, 8), (0, 9), (0, 0), (2, SlotType.Sleep), (-1, SlotType.Sleep)])
+def test_invalid_slots_are_rejected(node, slotType):
+    accumulator = SlotAccumulator(Model(), 2)
+    with pytest.raises(RuntimeError):
+        accumulator.onSlot(node, slotType)
+    assert accumulator.snapshot().slots == 0
@@ -0,0 +1,45 @@
+import time
+import numpy as np
+import pytest
+from model import Model
+from allocation import AllocationProblem, allocateCells, objectiveValue
+
+# The node sending to the sink carries the whole chain and used to get neither cells nor charge
+def test_sink_children_are_allocated_and_charged():
+    problem = AllocationProblem(Model(), [-1, 0, 1], demands=0.01, pdr=0.9)
+    allocation = allocateCells(problem)
+    assert np.all(allocation.txCells > 0)
+    assert np.argmax(allocation.chargePerSlotframe) == 0
+    assert allocation.chargePerSlotframe[0] > problem.slotframeLength * problem.sleepCharge
+
+def randomProblems(count, nodeCount=6, seed=3):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        parents = [-1] + [int(rng.integers(0, node)) for node in range(1, nodeCount)]
+        yield AllocationProblem(Model(), parents, demands=rng.uniform(0.001, 0.05, nodeCount),
+                                pdr=rng.uniform(0.6, 1, nodeCount), ackLoss=0.02)
+
+# The exact mode is the optimum, the greedy one may be worse but never better
+@pytest.mark.parametrize('objective', ['max', 'total'])
+def test_exact_is_no_worse_than_greedy(objective):
+    for problem in randomProblems(5):
+        exact = allocateCells(problem, objective, exact=True)
+        greedy = allocateCells(problem, objective)
+        assert np.all(greedy.txCells + greedy.rxCells <= problem.slotframeLength)
+        exactValue = objectiveValue(exact.chargePerSlotframe, objective)
+        greedyValue = objectiveValue(greedy.chargePerSlotframe, objective)
+        assert exactValue[0] <= greedyValue[0] + 1e-9
+
+def test_greedy_matches_exact_on_a_star():
+    problem = AllocationProblem(Model(), [-1, 0, 0, 0, 0], demands=0.01, pdr=0.9)
+    exact = allocateCells(problem, exact=True)
+    greedy = allocateCells(problem)
+    assert np.isclose(exact.chargePerSlotframe.max(), greedy.chargePerSlotframe.max())
+
+# The limit used to be checked only after every option of every group had been evaluated
+def test_exact_mode_rejects_large_groups_before_enumerating():
+    problem = AllocationProblem(Model(), [-1] + [0] * 24, demands=0.001, pdr=0.9)
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError):
+        allocateCells(problem, exact=True)
+    assert time.perf_counter() - start < 1
@@ -0,0 +1,15 @@
+import numpy as np
+from model import Model
+from montecarlo import NetworkScenario, simulateLifetime
+from analytic import networkSlots
+
+# Small tree whose nodes never run out of TX cells, where the closed form is the simulator's mean
+SCENARIO = NetworkScenario([-1, 0, 1], rates=[0.1, 0.2, 0.2], pdr=0.8, ackLoss=0.1, txCells=[4, 3, 2])
+
+def test_network_slots_match_monte_carlo():
+    estimate = simulateLifetime(Model(), SCENARIO, replications=4, horizon=7 * 86400, seed=3, workers=1)
+    slots = estimate.counts.mean(axis=0) / estimate.slotframes
+    assert np.allclose(slots, networkSlots(SCENARIO), rtol=0.02, atol=0.005)
+
+def test_network_slots_fill_the_slotframe():
+    assert np.allclose(networkSlots(SCENARIO).sum(axis=1), SCENARIO.slotframeLength)
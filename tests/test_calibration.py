@@ -0,0 +1,38 @@
+import numpy as np
+from model import Model, SlotType, SLOT_TYPES
+from plot import PlotCurrents
+from calibration import fitCaptures
+
+# Noisy captures of a device that follows the plot.py calibration, fitted starting from the model.py one
+def captures(truth, slotTypes, seed=0):
+    rng = np.random.default_rng(seed)
+    for slotType in slotTypes:
+        for packetSize in (10, 60, 125):
+            samples = truth.timeline(slotType, packetSize).waveform(1e6)
+            yield slotType, packetSize, samples + rng.normal(0, 0.2, len(samples))
+
+def test_currents_are_recovered():
+    truth = Model('CC2538', 0, currents=PlotCurrents('CC2538', 0))
+    reference = Model('CC2538', 0)
+    profile = fitCaptures(reference, captures(truth, SLOT_TYPES), workers=1)
+
+    captured = set(state for slotType in SLOT_TYPES for state in truth.timeline(slotType).states)
+    for state, current in truth.currents.items():
+        if state in captured:
+            assert abs(profile.currents[state] - current) < 0.05, state
+        else:
+            assert profile.currents[state] == reference.currents[state], state
+    assert profile.model().currents == profile.currents
+
+    durations = profile.durations()
+    for name, duration in zip(truth.timeline(SlotType.TxData, 0).names, truth.timeline(SlotType.TxData, 0).durations):
+        intercept, slope = durations[(SlotType.TxData, name)]
+        assert abs(intercept - duration) < 2, name
+
+def test_states_not_captured_keep_the_reference():
+    truth = Model('CC2538', 0, currents=PlotCurrents('CC2538', 0))
+    reference = Model('CC2538', 0)
+    profile = fitCaptures(reference, captures(truth, [SlotType.Sleep]), workers=2)
+
+    assert abs(profile.currents['CPU_SLEEP_RADIO_SLEEP'] - truth.currents['CPU_SLEEP_RADIO_SLEEP']) < 0.05
+    assert profile.currents['CPU_SLEEP_RADIO_TX'] == reference.currents['CPU_SLEEP_RADIO_TX']
@@ -0,0 +1,23 @@
+import numpy as np
+from model import Model, SLOT_TYPES
+from currenttrace import currentTrace, writeCurrentTrace
+
+def test_trace_matches_waveforms(tmp_path):
+    model = Model()
+    rng = np.random.default_rng(0)
+    slotTypes = rng.choice(SLOT_TYPES, 50)
+    packetSizes = rng.integers(0, 126, 50)
+
+    trace = currentTrace(model, str(tmp_path / 'trace.npy'), slotTypes, packetSizes, sampleRate=1e5, chunkSlots=7)
+    expected = model.waveforms(slotTypes, packetSizes, sampleRate=1e5).ravel()
+    assert trace.dtype == np.float32
+    assert np.array_equal(trace, expected.astype(np.float32))
+
+def test_chunks_hold_their_slots(tmp_path):
+    model = Model()
+    slotTypes = np.array(SLOT_TYPES * 3)
+    starts = []
+    for start, samples in writeCurrentTrace(model, str(tmp_path / 'trace.npy'), slotTypes, 100, sampleRate=1e4, chunkSlots=4):
+        starts.append(start)
+        assert np.array_equal(samples, model.waveforms(slotTypes[start:start + 4], 100, sampleRate=1e4).ravel().astype(np.float32))
+    assert starts == list(range(0, len(slotTypes), 4))
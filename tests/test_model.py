@@ -0,0 +1,79 @@
+import copy
+import json
+import os
+import pickle
+import numpy as np
+import pytest
+from model import Model, InstrumentedModel, SlotType, TX_POWERS, SLOT_TYPES, PACKET_LENGTH
+from sweep import sweep
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline')
+
+# Charges (uC) of packet sizes 0..125 of the original model.py, keyed by radio-txPower-slotType
+with open(os.path.join(BASELINE_DIR, 'charges.json')) as f:
+    CHARGES = json.load(f)
+
+CONFIGURATIONS = [(radio, power, slotType) for radio, powers in TX_POWERS.items() for power in powers for slotType in SLOT_TYPES]
+
+def key(radio, power, slotType):
+    return '%s-%d-%d' % (radio, power, slotType)
+
+def test_baseline_covers_every_configuration():
+    assert sorted(CHARGES) == sorted(key(*configuration) for configuration in CONFIGURATIONS)
+
+@pytest.mark.parametrize('radio,power,slotType', CONFIGURATIONS)
+def test_charges_match_baseline(radio, power, slotType):
+    model = Model(radio, power)
+    expected = CHARGES[key(radio, power, slotType)]
+    assert [model(slotType, packetSize) for packetSize in range(PACKET_LENGTH + 1)] == expected
+    assert list(model.batch(np.full(PACKET_LENGTH + 1, slotType), np.arange(PACKET_LENGTH + 1))) == expected
+
+# Copies used to recurse through __getattr__ before the wrapped model was set
+def test_instrumented_model_pickles_with_its_counts():
+    instrumented = InstrumentedModel(Model())
+    instrumented(SlotType.TxDataRxAck, 100)
+    instrumented.charges([SlotType.Sleep, SlotType.RxIdle])
+
+    for duplicate in (pickle.loads(pickle.dumps(instrumented)), copy.deepcopy(instrumented)):
+        assert duplicate.model is Model()
+        assert np.array_equal(duplicate.calls, instrumented.calls)
+        assert duplicate(SlotType.TxDataRxAck, 100) == instrumented.model(SlotType.TxDataRxAck, 100)
+
+def test_instrumented_models_merge():
+    first = InstrumentedModel(Model())
+    second = pickle.loads(pickle.dumps(first))
+    first.charges([SlotType.Sleep] * 3)
+    second(SlotType.Sleep)
+    first.merge(second)
+    assert first.calls[SlotType.Sleep] == 4
+    assert first.packetSizes[SlotType.Sleep, 0] == 4
+
+# A shorter slot only leaves room for shorter packets, the model stays usable for those
+def test_packet_dependent_phases_are_checked_per_slot():
+    model = Model('CC1200', 14, slotDuration=14000)
+    assert model(SlotType.Sleep) == pytest.approx(float(model.charges(SlotType.Sleep)), abs=0.005)
+    assert model(SlotType.TxDataRxAck, 50) > 0
+    assert np.all(model.timeline(SlotType.TxDataRxAck, 50).durations >= 0)
+
+    with pytest.raises(RuntimeError):
+        model(SlotType.TxDataRxAck, PACKET_LENGTH)
+    with pytest.raises(RuntimeError):
+        model.charges([SlotType.Sleep, SlotType.TxDataRxAck], [PACKET_LENGTH, PACKET_LENGTH])
+    with pytest.raises(RuntimeError):
+        model.timeline(SlotType.TxDataRxAck, PACKET_LENGTH)
+    with pytest.raises(RuntimeError):
+        model.expected(SlotType.TxDataRxAck, [50, PACKET_LENGTH])
+    assert np.all(model.charges([SlotType.Sleep, SlotType.TxDataRxAck], [PACKET_LENGTH, 50]) > 0)
+
+def test_packet_independent_phases_are_checked_at_construction():
+    with pytest.raises(RuntimeError):
+        Model('CC2538', 0, txOffset=2000)
+
+def test_packet_size_limits_match_the_sweep():
+    result = sweep(configurations=[('CC1200', 14)], slotDuration=[14000], cacheDir=None)
+    model = Model('CC1200', 14, slotDuration=14000)
+    for index, slotType in enumerate(SLOT_TYPES):
+        charges = result.charges[0, index].ravel()
+        minPacketSize, maxPacketSize = model.packetSizeLimits[slotType]
+        valid = (result.coords['packetSize'] >= minPacketSize) & (result.coords['packetSize'] <= maxPacketSize)
+        assert np.array_equal(~np.isnan(charges), valid)
@@ -0,0 +1,16 @@
+import numpy as np
+from model import Model
+from montecarlo import NetworkScenario, simulateLifetime
+
+SCENARIO = NetworkScenario([-1, 0, 1], rates=[0.1, 0.2, 0.2], pdr=0.8, ackLoss=0.1, txCells=[4, 3, 2])
+
+def test_lifetime_does_not_depend_on_workers():
+    serial = simulateLifetime(Model(), SCENARIO, replications=3, horizon=86400, seed=7, workers=1)
+    parallel = simulateLifetime(Model(), SCENARIO, replications=3, horizon=86400, seed=7, workers=2)
+    assert np.array_equal(serial.counts, parallel.counts)
+    assert np.array_equal(serial.dropped, parallel.dropped)
+
+def test_lifetime_depends_on_seed():
+    first = simulateLifetime(Model(), SCENARIO, replications=2, horizon=86400, seed=1, workers=1)
+    second = simulateLifetime(Model(), SCENARIO, replications=2, horizon=86400, seed=2, workers=1)
+    assert not np.array_equal(first.counts, second.counts)
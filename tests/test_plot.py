@@ -0,0 +1,74 @@
+import json
+import os
+import numpy as np
+import pytest
+import plot
+from model import SlotType, TX_POWERS
+from plot import PlotModel, timelinePoints, networkFrames, animateNetwork, drawEnvelope, draw, PACKET_LENGTH, SLOT_TYPE_NAMES
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline')
+
+# Plot points at PACKET_LENGTH of the original plot.py, keyed by radio-txPower-slotType
+with open(os.path.join(BASELINE_DIR, 'points.json')) as f:
+    POINTS = json.load(f)
+
+FIGURES = [(radio, power, getattr(SlotType, name)) for radio, powers in TX_POWERS.items() for power in powers for name in SLOT_TYPE_NAMES]
+
+@pytest.mark.parametrize('radio,power,slotType', FIGURES)
+def test_points_match_baseline(radio, power, slotType):
+    points = timelinePoints(PlotModel(radio, power).timeline(slotType, PACKET_LENGTH))
+    assert json.loads(json.dumps(points)) == POINTS['%s-%d-%d' % (radio, power, slotType)]
+
+# Drawing as a library must leave the backend the caller selected
+def test_drawing_keeps_the_callers_backend(tmp_path):
+    import matplotlib
+    previous = matplotlib.get_backend()
+    matplotlib.use('pdf')
+    try:
+        drawEnvelope(PlotModel(), [SlotType.TxDataRxAck, SlotType.Sleep], 100, path=str(tmp_path / 'envelope.pdf'))
+        draw('CC2538', 0, 'Sleep', timelinePoints(PlotModel().timeline(SlotType.Sleep)), str(tmp_path))
+        assert matplotlib.get_backend() == 'pdf'
+    finally:
+        matplotlib.use(previous)
+    assert (tmp_path / 'envelope.pdf').exists()
+
+def test_animation_updates_the_blitted_artists():
+    import matplotlib.pyplot as plt
+    model = PlotModel()
+    slotTypes = np.array([[SlotType.Sleep] * 40, [SlotType.TxDataRxAck] * 20 + [SlotType.Sleep] * 20])
+    times, cumulativeCharge, current = networkFrames(model, slotTypes, 100, slotsPerFrame=10)
+
+    animation = animateNetwork(model, slotTypes, 100, slotsPerFrame=10)
+    try:
+        assert plt.fignum_exists(animation._fig.number)
+        artists = animation._init_func()
+        chargeLine, currentLine, timeText = artists
+        assert not np.any(chargeLine.get_ydata()) and not np.any(currentLine.get_ydata())
+
+        # Blitting redraws the same artists every frame, only their data changes
+        for frame in range(len(times)):
+            assert animation._func(frame) == artists
+            assert np.array_equal(chargeLine.get_ydata(), cumulativeCharge[frame])
+            assert np.array_equal(currentLine.get_ydata(), current[frame])
+            assert timeText.get_text() == '%.1f s' % times[frame]
+        assert cumulativeCharge[-1][1] > cumulativeCharge[0][1]
+    finally:
+        plt.close(animation._fig)
+
+# Styling is an input of the figures: draw() takes it from figureStyle() and changing it renders them again
+def test_style_changes_rerender(tmp_path, monkeypatch):
+    import matplotlib.pyplot as plt
+    configurations = [('CC2538', 0)]
+    assert len(plot.renderAll(configurations, str(tmp_path), workers=1)) == len(SLOT_TYPE_NAMES)
+    assert plot.renderAll(configurations, str(tmp_path), workers=1) == []
+
+    titles = []
+    savefig = plt.savefig
+    def recordTitle(*args, **kwargs):
+        titles.append(plt.gca().get_title())
+        savefig(*args, **kwargs)
+    figureStyle = plot.figureStyle
+    monkeypatch.setattr(plot, 'figureStyle', lambda radio, power: dict(figureStyle(radio, power), title='%s figure'))
+    monkeypatch.setattr(plt, 'savefig', recordTitle)
+    assert len(plot.renderAll(configurations, str(tmp_path), workers=1)) == len(SLOT_TYPE_NAMES)
+    assert titles == [name + ' figure' for name in SLOT_TYPE_NAMES]
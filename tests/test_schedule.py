@@ -0,0 +1,17 @@
+import numpy as np
+from model import Model, SLOT_TYPES, PACKET_LENGTH
+from schedule import evaluateScenarios
+
+def test_scenarios_do_not_depend_on_workers():
+    rng = np.random.default_rng(1)
+    scenarios = []
+    for radio, power in (('CC2538', 0), ('CC1200', 14)):
+        nodeIndices = np.sort(rng.integers(0, 50, 2000))
+        slotTypes = rng.choice(SLOT_TYPES, 2000)
+        packetSizes = rng.integers(0, PACKET_LENGTH + 1, 2000)
+        scenarios.append((Model(radio, power), 101, 50, nodeIndices, slotTypes, packetSizes))
+
+    serial = evaluateScenarios(scenarios, workers=1, shardSize=16)
+    parallel = evaluateScenarios(scenarios, workers=2, shardSize=16)
+    for a, b in zip(serial, parallel):
+        assert np.array_equal(a.chargePerSlotframe, b.chargePerSlotframe)
@@ -0,0 +1,32 @@
+import numpy as np
+from model import Model, SlotType
+from slottrace import TRACE_DTYPE, COLUMNS, ColumnarTrace, writeColumnarTrace, effectiveSlotTypes
+
+def records(rows):
+    return np.array(rows, dtype=TRACE_DTYPE)
+
+# Node 1's records arrive out of ASN order, within a chunk and across chunks
+CHUNKS = [records([(5, 1, SlotType.TxDataRxAck, 100, 1), (1, 0, SlotType.Sleep, 0, 0), (2, 1, SlotType.RxIdle, 0, 0)]),
+          records([(3, 0, SlotType.RxDataTxAck, 50, 0), (1, 1, SlotType.TxDataRxAck, 20, 0), (9, 2, SlotType.Sleep, 0, 0)])]
+
+def test_columns_are_grouped_by_node_and_sorted_by_asn(tmp_path):
+    writeColumnarTrace(str(tmp_path), lambda: iter(CHUNKS))
+    trace = ColumnarTrace(str(tmp_path))
+
+    assert trace.nodeCount() == 3
+    allRecords = np.concatenate(CHUNKS)
+    for node in range(3):
+        expected = np.sort(allRecords[allRecords['node'] == node], order='asn', kind='stable')
+        nodeRecords = trace.records(node)
+        for name in COLUMNS:
+            assert np.array_equal(nodeRecords[name], expected[name])
+
+def test_window_energy(tmp_path):
+    writeColumnarTrace(str(tmp_path), lambda: iter(CHUNKS))
+    trace = ColumnarTrace(str(tmp_path))
+    model = Model()
+
+    window = records([(2, 1, SlotType.RxIdle, 0, 0), (5, 1, SlotType.TxDataRxAck, 100, 1)])
+    assert np.isclose(trace.energy(model, 1, 2, 6), np.sum(model.charges(effectiveSlotTypes(window), window['packetSize'])))
+    assert trace.energy(model, 1, 6, 9) == 0
+    assert trace.records(5)['asn'].size == 0
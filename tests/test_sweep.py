@@ -0,0 +1,30 @@
+import numpy as np
+from model import PhaseFunction, Currents, SLOT_TYPES, TS_TX_OFFSET, TS_TX_ACK_DELAY, TS_LONG_GT, TS_SHORT_GT
+from sweep import sweep
+
+# Charges and validity straight from the phase tables
+def phaseCharge(radio, txPower, slotType, packetSize, slotDuration):
+    currents = Currents(radio, txPower)
+    phases = PhaseFunction(radio, slotDuration, TS_TX_OFFSET, TS_TX_ACK_DELAY, TS_LONG_GT, TS_SHORT_GT)(slotType, packetSize)
+    if min(duration for name, duration, state in phases) < 0:
+        return np.nan
+    return sum(duration * currents[state] for name, duration, state in phases) / 1000
+
+def test_grid_matches_phase_tables_and_masks_negative_phases():
+    configurations = [('CC1200', 14), ('CC2538', 0)]
+    packetSizes = [0, 50, 125]
+    slotDurations = [14000, 15000]
+    result = sweep(configurations=configurations, packetSizes=packetSizes, slotDuration=slotDurations, cacheDir=None)
+
+    expected = np.array([[[[phaseCharge(radio, power, slotType, packetSize, slotDuration) for slotDuration in slotDurations]
+                           for packetSize in packetSizes] for slotType in SLOT_TYPES] for radio, power in configurations])
+    charges = result.charges.reshape(expected.shape)
+    assert np.any(np.isnan(expected))
+    assert np.array_equal(np.isnan(charges), np.isnan(expected))
+    assert np.allclose(charges[~np.isnan(expected)], expected[~np.isnan(expected)], rtol=0, atol=1e-9)
+
+def test_cached_result_is_reused(tmp_path):
+    first = sweep(configurations=[('CC2538', 3)], packetSizes=[0, 125], txOffset=[3000, 4000], cacheDir=str(tmp_path))
+    second = sweep(configurations=[('CC2538', 3)], packetSizes=[0, 125], txOffset=[3000, 4000], cacheDir=str(tmp_path))
+    assert len(list(tmp_path.iterdir())) == 1
+    assert np.array_equal(first.charges, second.charges, equal_nan=True)